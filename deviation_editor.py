@@ -2,24 +2,100 @@
 Editor for HAZOP deviations/notes.
 """
 import tkinter as tk
-from tkinter import ttk, scrolledtext
+from tkinter import ttk
 from models import Deviation
 
 
+class _ListField(ttk.Frame):
+    """Entry with Add/Remove buttons above a listbox, editing a list of strings."""
+    
+    def __init__(self, parent, items=()):
+        super().__init__(parent)
+        # Python copy of the listbox contents, kept in step so it never has to be read back
+        self.items = []
+        
+        # Entry widget and Add button on same row
+        self.entry = ttk.Entry(self, width=50)
+        self.entry.grid(row=0, column=0, sticky=tk.EW, pady=5)
+        self.entry.bind("<Return>", lambda e: self.add())
+        
+        btn_frame = ttk.Frame(self)
+        btn_frame.grid(row=0, column=1, padx=5)
+        ttk.Button(btn_frame, text="Add", command=self.add).pack(side=tk.LEFT, padx=2)
+        ttk.Button(btn_frame, text="Remove", command=self.remove_selected).pack(side=tk.LEFT, padx=2)
+        
+        # Listbox below entry and buttons
+        list_frame = ttk.Frame(self)
+        list_frame.grid(row=1, column=0, sticky=tk.NSEW, pady=5)
+        
+        self.listbox = tk.Listbox(list_frame, height=5)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.listbox.yview)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.config(yscrollcommand=scroll.set)
+        
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+        
+        self.load(items)
+    
+    def load(self, items):
+        """Replace the contents with items and clear the entry."""
+        self.items = list(items)
+        self.entry.delete(0, tk.END)
+        self.listbox.delete(0, tk.END)
+        # Listbox.insert takes any number of items, so this is one Tcl call
+        if self.items:
+            self.listbox.insert(tk.END, *self.items)
+    
+    def add(self):
+        """Add the entry text as a new item."""
+        text = self.entry.get().strip()
+        if text:
+            self.listbox.insert(tk.END, text)
+            self.items.append(text)
+            self.entry.delete(0, tk.END)
+    
+    def remove_selected(self):
+        """Remove the selected item."""
+        selection = self.listbox.curselection()
+        if selection:
+            self.listbox.delete(selection[0])
+            del self.items[selection[0]]
+
+
 class DeviationEditor(tk.Toplevel):
     """Window for editing a deviation."""
     
-    def __init__(self, parent, deviation: Deviation, on_save_callback=None):
+    def __init__(self, parent, deviation: Deviation, on_save_callback=None, keep_alive=False):
         super().__init__(parent)
+        # Stay hidden while widgets are built and filled so Tk lays the window out once
+        self.withdraw()
         self.deviation = deviation
         self.on_save_callback = on_save_callback
         self.result = None
+        # When kept alive the editor is hidden instead of destroyed so it can be reused
+        self.keep_alive = keep_alive
+        # Written every time the editor is closed; callers can wait_variable on it
+        self.closed = tk.BooleanVar(self, value=False)
         
         self.title("Edit Deviation")
         self.geometry("600x700")
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
         
         self.create_widgets()
         self.load_data()
+        self.update_idletasks()
+        self.deiconify()
+    
+    def edit(self, deviation: Deviation, on_save_callback=None):
+        """Load another deviation into a kept-alive editor and show it."""
+        self.deviation = deviation
+        self.on_save_callback = on_save_callback
+        self.result = None
+        self.load_data()
+        self.deiconify()
+        self.lift()
     
     def create_widgets(self):
         """Create the editor widgets."""
@@ -34,81 +110,27 @@ class DeviationEditor(tk.Toplevel):
         
         # Causes
         ttk.Label(main_frame, text="Causes:").grid(row=1, column=0, sticky=tk.W, pady=5)
-        
-        # Entry widget and Add button on same row
-        self.cause_entry = ttk.Entry(main_frame, width=50)
-        self.cause_entry.grid(row=1, column=1, sticky=tk.EW, pady=5)
-        self.cause_entry.bind("<Return>", lambda e: self.add_cause())
-        
-        causes_btn_frame = ttk.Frame(main_frame)
-        causes_btn_frame.grid(row=1, column=2, padx=5)
-        ttk.Button(causes_btn_frame, text="Add", command=self.add_cause).pack(side=tk.LEFT, padx=2)
-        ttk.Button(causes_btn_frame, text="Remove", command=self.remove_cause).pack(side=tk.LEFT, padx=2)
-        
-        # Listbox below entry and buttons
-        causes_frame = ttk.Frame(main_frame)
-        causes_frame.grid(row=2, column=1, sticky=tk.EW, pady=5)
-        
-        self.causes_listbox = tk.Listbox(causes_frame, height=5)
-        self.causes_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        causes_scroll = ttk.Scrollbar(causes_frame, orient=tk.VERTICAL, command=self.causes_listbox.yview)
-        causes_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.causes_listbox.config(yscrollcommand=causes_scroll.set)
+        self.causes_field = _ListField(main_frame)
+        self.causes_field.grid(row=1, column=1, rowspan=2, columnspan=2, sticky=tk.NSEW)
         
         # Consequence
         ttk.Label(main_frame, text="Consequence:").grid(row=3, column=0, sticky=tk.W, pady=5)
-        self.consequence_text = scrolledtext.ScrolledText(main_frame, width=50, height=4)
+        self.consequence_text = tk.Text(main_frame, width=50, height=4, wrap=tk.WORD)
         self.consequence_text.grid(row=3, column=1, sticky=tk.EW, pady=5)
         
         # Safeguards
         ttk.Label(main_frame, text="Safeguards:").grid(row=4, column=0, sticky=tk.W, pady=5)
-        
-        # Entry widget and Add button on same row
-        self.safeguard_entry = ttk.Entry(main_frame, width=50)
-        self.safeguard_entry.grid(row=4, column=1, sticky=tk.EW, pady=5)
-        self.safeguard_entry.bind("<Return>", lambda e: self.add_safeguard())
-        
-        safeguards_btn_frame = ttk.Frame(main_frame)
-        safeguards_btn_frame.grid(row=4, column=2, padx=5)
-        ttk.Button(safeguards_btn_frame, text="Add", command=self.add_safeguard).pack(side=tk.LEFT, padx=2)
-        ttk.Button(safeguards_btn_frame, text="Remove", command=self.remove_safeguard).pack(side=tk.LEFT, padx=2)
-        
-        # Listbox below entry and buttons
-        safeguards_frame = ttk.Frame(main_frame)
-        safeguards_frame.grid(row=5, column=1, sticky=tk.EW, pady=5)
-        
-        self.safeguards_listbox = tk.Listbox(safeguards_frame, height=5)
-        self.safeguards_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        safeguards_scroll = ttk.Scrollbar(safeguards_frame, orient=tk.VERTICAL, command=self.safeguards_listbox.yview)
-        safeguards_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.safeguards_listbox.config(yscrollcommand=safeguards_scroll.set)
+        self.safeguards_field = _ListField(main_frame)
+        self.safeguards_field.grid(row=4, column=1, rowspan=2, columnspan=2, sticky=tk.NSEW)
         
         # Recommendations
         ttk.Label(main_frame, text="Recommendations:").grid(row=6, column=0, sticky=tk.W, pady=5)
-        
-        # Entry widget and Add button on same row
-        self.recommendation_entry = ttk.Entry(main_frame, width=50)
-        self.recommendation_entry.grid(row=6, column=1, sticky=tk.EW, pady=5)
-        self.recommendation_entry.bind("<Return>", lambda e: self.add_recommendation())
-        
-        recommendations_btn_frame = ttk.Frame(main_frame)
-        recommendations_btn_frame.grid(row=6, column=2, padx=5)
-        ttk.Button(recommendations_btn_frame, text="Add", command=self.add_recommendation).pack(side=tk.LEFT, padx=2)
-        ttk.Button(recommendations_btn_frame, text="Remove", command=self.remove_recommendation).pack(side=tk.LEFT, padx=2)
-        
-        # Listbox below entry and buttons
-        recommendations_frame = ttk.Frame(main_frame)
-        recommendations_frame.grid(row=7, column=1, sticky=tk.EW, pady=5)
-        
-        self.recommendations_listbox = tk.Listbox(recommendations_frame, height=5)
-        self.recommendations_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        recommendations_scroll = ttk.Scrollbar(recommendations_frame, orient=tk.VERTICAL, command=self.recommendations_listbox.yview)
-        recommendations_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.recommendations_listbox.config(yscrollcommand=recommendations_scroll.set)
+        self.recommendations_field = _ListField(main_frame)
+        self.recommendations_field.grid(row=6, column=1, rowspan=2, columnspan=2, sticky=tk.NSEW)
         
         # Comments
         ttk.Label(main_frame, text="Comments:").grid(row=8, column=0, sticky=tk.W, pady=5)
-        self.comments_text = scrolledtext.ScrolledText(main_frame, width=50, height=4)
+        self.comments_text = tk.Text(main_frame, width=50, height=4, wrap=tk.WORD)
         self.comments_text.grid(row=8, column=1, sticky=tk.EW, pady=5)
         
         # Buttons
@@ -128,78 +150,52 @@ class DeviationEditor(tk.Toplevel):
         self.deviation_entry.delete(0, tk.END)
         self.deviation_entry.insert(0, self.deviation.deviation)
         
-        self.causes_listbox.delete(0, tk.END)
-        for cause in self.deviation.causes:
-            self.causes_listbox.insert(tk.END, cause)
+        self.causes_field.load(self.deviation.causes)
         
         self.consequence_text.delete(1.0, tk.END)
         self.consequence_text.insert(1.0, self.deviation.consequence)
         
-        self.safeguards_listbox.delete(0, tk.END)
-        for safeguard in self.deviation.safeguards:
-            self.safeguards_listbox.insert(tk.END, safeguard)
-        
-        self.recommendations_listbox.delete(0, tk.END)
-        for recommendation in self.deviation.recommendations:
-            self.recommendations_listbox.insert(tk.END, recommendation)
+        self.safeguards_field.load(self.deviation.safeguards)
+        self.recommendations_field.load(self.deviation.recommendations)
         
         self.comments_text.delete(1.0, tk.END)
         self.comments_text.insert(1.0, self.deviation.comments)
-    
-    def add_cause(self):
-        """Add a cause."""
-        cause = self.cause_entry.get().strip()
-        if cause:
-            self.causes_listbox.insert(tk.END, cause)
-            self.cause_entry.delete(0, tk.END)
-    
-    def remove_cause(self):
-        """Remove selected cause."""
-        selection = self.causes_listbox.curselection()
-        if selection:
-            self.causes_listbox.delete(selection[0])
-    
-    def add_safeguard(self):
-        """Add a safeguard."""
-        safeguard = self.safeguard_entry.get().strip()
-        if safeguard:
-            self.safeguards_listbox.insert(tk.END, safeguard)
-            self.safeguard_entry.delete(0, tk.END)
-    
-    def remove_safeguard(self):
-        """Remove selected safeguard."""
-        selection = self.safeguards_listbox.curselection()
-        if selection:
-            self.safeguards_listbox.delete(selection[0])
-    
-    def add_recommendation(self):
-        """Add a recommendation."""
-        recommendation = self.recommendation_entry.get().strip()
-        if recommendation:
-            self.recommendations_listbox.insert(tk.END, recommendation)
-            self.recommendation_entry.delete(0, tk.END)
-    
-    def remove_recommendation(self):
-        """Remove selected recommendation."""
-        selection = self.recommendations_listbox.curselection()
-        if selection:
-            self.recommendations_listbox.delete(selection[0])
+        
+        self._initial = self.deviation.snapshot()
     
     def save(self):
         """Save deviation data."""
         self.deviation.deviation = self.deviation_entry.get()
-        self.deviation.causes = list(self.causes_listbox.get(0, tk.END))
+        # Only replace lists whose contents differ from what was loaded
+        if self.causes_field.items != self.deviation.causes:
+            self.deviation.causes = self.causes_field.items
         self.deviation.consequence = self.consequence_text.get(1.0, tk.END).strip()
-        self.deviation.safeguards = list(self.safeguards_listbox.get(0, tk.END))
-        self.deviation.recommendations = list(self.recommendations_listbox.get(0, tk.END))
+        if self.safeguards_field.items != self.deviation.safeguards:
+            self.deviation.safeguards = self.safeguards_field.items
+        if self.recommendations_field.items != self.deviation.recommendations:
+            self.deviation.recommendations = self.recommendations_field.items
         self.deviation.comments = self.comments_text.get(1.0, tk.END).strip()
+        self.result = "changed" if self.deviation.snapshot() != self._initial else None
         
         if self.on_save_callback:
             self.on_save_callback(self.deviation)
         
-        self.destroy()
+        self.close()
     
     def cancel(self):
         """Cancel editing."""
-        self.destroy()
+        self.close()
+    
+    def close(self):
+        """Hide the editor if it is kept alive, otherwise destroy it."""
+        if self.keep_alive:
+            self.withdraw()
+            self.closed.set(True)
+        else:
+            self.destroy()
+    
+    def destroy(self):
+        """Destroy the editor, releasing anyone waiting for it to close."""
+        self.closed.set(True)
+        super().destroy()
 
@@ -3,41 +3,49 @@ Dialog for viewing and managing deviations for a node.
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-from models import Node, Deviation
+from models import Node, Deviation, HAZOPData
 from deviation_editor import DeviationEditor
 
 
 class DeviationListDialog(tk.Toplevel):
     """Dialog for viewing and managing deviations for a node."""
     
-    def __init__(self, parent, node: Node, on_update_callback=None):
+    def __init__(self, parent, node: Node, hazop_data: HAZOPData, on_update_callback=None):
         super().__init__(parent)
         self.node = node
+        self.hazop_data = hazop_data
         self.on_update_callback = on_update_callback
+        # Shared editor, created on first use and hidden between edits
+        self._editor = None
         
         self.title(f"Deviations for {node.name}")
         self.geometry("600x400")
         self.transient(parent)
         
         self.create_widgets()
-        self.refresh_list()
+        self._full_refresh()
     
     def create_widgets(self):
         """Create dialog widgets."""
         main_frame = ttk.Frame(self, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Listbox with scrollbar
+        # Deviation list with scrollbar
         list_frame = ttk.Frame(main_frame)
         list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        self.deviation_listbox = tk.Listbox(list_frame, height=10)
-        self.deviation_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.deviation_listbox.bind("<Double-Button-1>", self.on_double_click)
+        self.tree = ttk.Treeview(list_frame, columns=("summary",), show="headings",
+                                 selectmode="browse", height=10)
+        self.tree.heading("summary", text="Deviation", anchor=tk.W)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.bind("<Double-Button-1>", self.on_double_click)
         
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.deviation_listbox.yview)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.deviation_listbox.config(yscrollcommand=scrollbar.set)
+        self.tree.config(yscrollcommand=scrollbar.set)
+        
+        # Tree item ID of each row, parallel to node.deviations
+        self._row_ids = []
         
         # Buttons
         btn_frame = ttk.Frame(main_frame)
@@ -48,14 +56,39 @@ class DeviationListDialog(tk.Toplevel):
         ttk.Button(btn_frame, text="Delete", command=self.delete_selected).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Close", command=self.destroy).pack(side=tk.RIGHT, padx=2)
     
-    def refresh_list(self):
-        """Refresh the deviation list."""
-        self.deviation_listbox.delete(0, tk.END)
-        for i, dev in enumerate(self.node.deviations):
-            display_text = dev.deviation or f"Deviation {i+1}"
-            if len(display_text) > 50:
-                display_text = display_text[:47] + "..."
-            self.deviation_listbox.insert(tk.END, display_text)
+    def _full_refresh(self):
+        """Rebuild the whole deviation list."""
+        if self._row_ids:
+            self.tree.delete(*self._row_ids)
+        self._row_ids = [
+            self.tree.insert("", tk.END, values=(dev.display_text(i),))
+            for i, dev in enumerate(self.node.deviations)
+        ]
+    
+    def _append_row(self, dev):
+        """Add a row for a deviation appended to the node."""
+        index = len(self._row_ids)
+        self._row_ids.append(self.tree.insert("", tk.END, values=(dev.display_text(index),)))
+    
+    def _update_row(self, index, dev):
+        """Refresh the row of an edited deviation."""
+        self.tree.item(self._row_ids[index], values=(dev.display_text(index),))
+    
+    def _delete_row(self, index):
+        """Remove the row of a deleted deviation."""
+        self.tree.delete(self._row_ids.pop(index))
+        # Unnamed deviations after the removed one are labelled by position
+        deviations = self.node.deviations
+        for i in range(index, len(self._row_ids)):
+            if not deviations[i].deviation:
+                self._update_row(i, deviations[i])
+    
+    def selected_index(self):
+        """Return the index of the selected deviation, or None."""
+        selection = self.tree.selection()
+        if not selection:
+            return None
+        return self.tree.index(selection[0])
     
     def on_double_click(self, event):
         """Handle double-click on deviation."""
@@ -64,45 +97,64 @@ class DeviationListDialog(tk.Toplevel):
     def add_new(self):
         """Add a new deviation."""
         deviation = Deviation()
-        editor = DeviationEditor(self, deviation, on_save_callback=self.save_deviation)
-        self.wait_window(editor)
+        self.open_editor(deviation, lambda dev, changed: self.save_deviation(dev))
     
     def edit_selected(self):
         """Edit selected deviation."""
-        selection = self.deviation_listbox.curselection()
-        if not selection:
+        index = self.selected_index()
+        if index is None:
             return
         
-        index = selection[0]
         deviation = self.node.deviations[index]
-        editor = DeviationEditor(self, deviation, on_save_callback=lambda dev: self.update_deviation(index, dev))
-        self.wait_window(editor)
+        self.open_editor(deviation, lambda dev, changed: self.update_deviation(index, dev, changed))
+    
+    def open_editor(self, deviation, on_save_callback):
+        """Show the shared deviation editor for a deviation and wait until it is closed.
+        
+        on_save_callback is called with the deviation and whether the editor changed it.
+        """
+        def on_save(dev):
+            on_save_callback(dev, editor.result == "changed")
+        
+        editor = self._editor
+        if editor is None or not editor.winfo_exists():
+            editor = self._editor = DeviationEditor(self, deviation, on_save_callback=on_save,
+                                                    keep_alive=True)
+        elif editor.state() == "withdrawn":
+            editor.edit(deviation, on_save_callback=on_save)
+        else:
+            # The shared editor is still open on another deviation; use a one-off editor
+            editor = DeviationEditor(self, deviation, on_save_callback=on_save)
+            self.wait_window(editor)
+            return
+        self.wait_variable(editor.closed)
     
     def delete_selected(self):
         """Delete selected deviation."""
-        selection = self.deviation_listbox.curselection()
-        if not selection:
+        index = self.selected_index()
+        if index is None:
             return
         
-        index = selection[0]
         deviation = self.node.deviations[index]
         if messagebox.askyesno("Delete Deviation", f"Delete deviation '{deviation.deviation}'?"):
-            self.node.deviations.pop(index)
-            self.refresh_list()
+            self.hazop_data.remove_deviation(self.node, deviation)
+            self._delete_row(index)
             if self.on_update_callback:
                 self.on_update_callback()
     
     def save_deviation(self, deviation):
         """Save a new deviation."""
-        self.node.deviations.append(deviation)
-        self.refresh_list()
+        self.hazop_data.add_deviation(self.node, deviation)
+        self._append_row(deviation)
         if self.on_update_callback:
             self.on_update_callback()
     
-    def update_deviation(self, index, deviation):
+    def update_deviation(self, index, deviation, changed=True):
         """Update an existing deviation."""
+        if not changed:
+            return
         self.node.deviations[index] = deviation
-        self.refresh_list()
+        self._update_row(index, deviation)
         if self.on_update_callback:
             self.on_update_callback()
 
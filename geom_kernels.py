@@ -0,0 +1,39 @@
+"""
+Compiled geometry kernels for hit-testing, available when Numba is installed.
+"""
+try:
+    from numba import njit
+except ImportError:  # numba is optional; callers fall back to NumPy
+    njit = None
+
+
+def _scan_polyline(px, py, coords):
+    """Return (squared distance, segment index) of the segment of a polyline nearest (px, py).
+
+    coords is the flat x0, y0, x1, y1, ... array of at least two points.
+    """
+    best_dist_sq = float('inf')
+    best_index = -1
+    for i in range(len(coords) // 2 - 1):
+        x1 = coords[2 * i]
+        y1 = coords[2 * i + 1]
+        dx = coords[2 * i + 2] - x1
+        dy = coords[2 * i + 3] - y1
+
+        # Closest point on the segment; a zero-length segment is just its start point
+        length_sq = dx * dx + dy * dy
+        t = 0.0
+        if length_sq > 0.0:
+            t = ((px - x1) * dx + (py - y1) * dy) / length_sq
+            t = min(1.0, max(0.0, t))
+
+        ox = px - (x1 + t * dx)
+        oy = py - (y1 + t * dy)
+        dist_sq = ox * ox + oy * oy
+        if dist_sq < best_dist_sq:
+            best_dist_sq = dist_sq
+            best_index = i
+    return best_dist_sq, best_index
+
+
+scan_polyline = njit(cache=True)(_scan_polyline) if njit is not None else None
@@ -4,11 +4,14 @@ Main application window for VisualHAZOP.
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser
 from pdf_viewer import PDFViewer
-from deviation_editor import DeviationEditor
-from deviation_list_dialog import DeviationListDialog
-from spreadsheet_view import SpreadsheetView
 from models import Node, Deviation, HAZOPData
+from functools import lru_cache
 import os
+import queue
+import threading
+
+# Status messages show the same few file names over and over
+_basename = lru_cache(maxsize=64)(os.path.basename)
 
 
 class VisualHAZOPApp(tk.Tk):
@@ -23,10 +26,13 @@ class VisualHAZOPApp(tk.Tk):
         self.selected_node = None
         self.spreadsheet_window = None
         self._save_path = None  # Track save path
+        self._redraw_pending = False  # A coalesced redraw is queued with after_idle
+        self._load_token = 0  # Identifies the latest background load; earlier ones are ignored
         
         self.create_menu()
         self.create_toolbar()
         self.create_main_content()
+        self._update_action_state()
         
         # Bind keyboard shortcuts
         self.bind("<Control-l>", lambda e: self.start_line_creation())
@@ -54,7 +60,7 @@ class VisualHAZOPApp(tk.Tk):
         file_menu.add_command(label="Exit", command=self.quit)
         
         # Edit menu
-        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu = self.edit_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Edit", menu=edit_menu)
         edit_menu.add_command(label="Create Line", command=self.start_line_creation, accelerator="Ctrl+L")
         edit_menu.add_command(label="Edit Node Properties", command=self.edit_selected_node_properties)
@@ -76,7 +82,7 @@ class VisualHAZOPApp(tk.Tk):
         view_menu.add_command(label="Previous Page", command=self.prev_page, accelerator="PgUp")
         
         # Tools menu
-        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu = self.tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Tools", menu=tools_menu)
         tools_menu.add_command(label="Export to Excel", command=self.export_to_excel)
     
@@ -86,11 +92,17 @@ class VisualHAZOPApp(tk.Tk):
         toolbar.pack(fill=tk.X, padx=5, pady=5)
         
         ttk.Button(toolbar, text="Open PDF", command=self.open_pdf).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Create Line (Ctrl+L)", command=self.start_line_creation).pack(side=tk.LEFT, padx=2)
+        self.create_line_button = ttk.Button(toolbar, text="Create Line (Ctrl+L)", command=self.start_line_creation)
+        self.create_line_button.pack(side=tk.LEFT, padx=2)
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=5)
-        ttk.Button(toolbar, text="Edit Node", command=self.edit_selected_node_properties).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Add Deviation", command=self.add_deviation_to_selected).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Manage Deviations", command=self.manage_deviations).pack(side=tk.LEFT, padx=2)
+        # Buttons that act on the selected node
+        self.node_buttons = []
+        for text, command in (("Edit Node", self.edit_selected_node_properties),
+                              ("Add Deviation", self.add_deviation_to_selected),
+                              ("Manage Deviations", self.manage_deviations)):
+            button = ttk.Button(toolbar, text=text, command=command)
+            button.pack(side=tk.LEFT, padx=2)
+            self.node_buttons.append(button)
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=5)
         ttk.Button(toolbar, text="Spreadsheet", command=self.show_spreadsheet).pack(side=tk.LEFT, padx=2)
         ttk.Separator(toolbar, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=5)
@@ -131,7 +143,8 @@ class VisualHAZOPApp(tk.Tk):
         if filename:
             self.hazop_data.pdf_path = filename
             self.pdf_viewer.load_pdf(filename)
-            self.update_status(f"Opened: {os.path.basename(filename)}")
+            self._update_action_state()
+            self.update_status(f"Opened: {_basename(filename)}")
     
     def load_analysis(self):
         """Load HAZOP analysis data from JSON."""
@@ -140,33 +153,60 @@ class VisualHAZOPApp(tk.Tk):
             filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
         )
         if filename:
-            try:
-                self.hazop_data = HAZOPData.from_json(filename)
-                self._save_path = filename  # Set save path when loading
-                self.pdf_viewer.load_data(self.hazop_data)
-                
-                # Load PDF if path exists
-                if self.hazop_data.pdf_path and os.path.exists(self.hazop_data.pdf_path):
-                    self.pdf_viewer.load_pdf(self.hazop_data.pdf_path)
-                elif self.hazop_data.pdf_path:
-                    # PDF path in data but file doesn't exist - ask user
-                    if messagebox.askyesno("PDF Not Found", 
-                                         f"PDF file not found at:\n{self.hazop_data.pdf_path}\n\nWould you like to locate it?"):
-                        pdf_file = filedialog.askopenfilename(
-                            title="Locate PDF File",
-                            filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
-                        )
-                        if pdf_file:
-                            self.hazop_data.pdf_path = pdf_file
-                            self.pdf_viewer.load_pdf(pdf_file)
-                
-                self.update_status(f"Loaded analysis from {os.path.basename(filename)}")
-                # Refresh spreadsheet if open
-                if self.spreadsheet_window and self.spreadsheet_window.winfo_exists():
-                    self.spreadsheet_window.hazop_data = self.hazop_data
-                    self.spreadsheet_window.refresh_data()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load analysis: {str(e)}")
+            # Parse on a worker thread so the window stays responsive for large files
+            self.update_status(f"Loading {_basename(filename)}...")
+            self._load_token += 1
+            results = queue.Queue()
+            threading.Thread(target=self._load_worker, args=(filename, results), daemon=True).start()
+            self.after(50, self._poll_load, filename, results, self._load_token)
+    
+    def _load_worker(self, filename, results):
+        """Read an analysis file off the Tk thread and queue the result or error."""
+        try:
+            results.put(HAZOPData.from_json(filename))
+        except Exception as e:
+            results.put(e)
+    
+    def _poll_load(self, filename, results, token):
+        """Apply a finished background load on the Tk thread, unless a later load replaced it."""
+        if token != self._load_token:
+            return  # The worker's result is simply dropped
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            self.after(50, self._poll_load, filename, results, token)
+            return
+        
+        if isinstance(result, Exception):
+            messagebox.showerror("Error", f"Failed to load analysis: {str(result)}")
+            self.update_status("Ready")
+            return
+        
+        try:
+            self.hazop_data = result
+            self._save_path = filename  # Set save path when loading
+            self.pdf_viewer.load_data(self.hazop_data)
+            
+            # Load PDF if path exists
+            if self.hazop_data.pdf_path and os.path.exists(self.hazop_data.pdf_path):
+                self.pdf_viewer.load_pdf(self.hazop_data.pdf_path)
+            elif self.hazop_data.pdf_path:
+                # PDF path in data but file doesn't exist - ask user
+                if messagebox.askyesno("PDF Not Found", 
+                                     f"PDF file not found at:\n{self.hazop_data.pdf_path}\n\nWould you like to locate it?"):
+                    pdf_file = filedialog.askopenfilename(
+                        title="Locate PDF File",
+                        filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")]
+                    )
+                    if pdf_file:
+                        self.hazop_data.pdf_path = pdf_file
+                        self.pdf_viewer.load_pdf(pdf_file)
+            
+            self._update_action_state()
+            self.update_status(f"Loaded analysis from {_basename(filename)}")
+            self._sync_spreadsheet()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load analysis: {str(e)}")
     
     def save_data(self):
         """Save HAZOP analysis data to JSON."""
@@ -178,8 +218,8 @@ class VisualHAZOPApp(tk.Tk):
                 self.pdf_viewer.hazop_data = self.hazop_data
                 self.hazop_data.to_json(self._save_path)
                 node_count = len(self.hazop_data.nodes)
-                dev_count = sum(len(node.deviations) for node in self.hazop_data.nodes)
-                self.update_status(f"Saved {node_count} nodes, {dev_count} deviations to {os.path.basename(self._save_path)}")
+                dev_count = self.hazop_data.deviation_count
+                self.update_status(f"Saved {node_count} nodes, {dev_count} deviations to {_basename(self._save_path)}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save: {str(e)}")
     
@@ -194,13 +234,13 @@ class VisualHAZOPApp(tk.Tk):
             try:
                 self.hazop_data.to_json(filename)
                 self._save_path = filename
-                self.update_status(f"Saved to {os.path.basename(filename)}")
+                self.update_status(f"Saved to {_basename(filename)}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save: {str(e)}")
     
     def start_line_creation(self):
         """Start creating a new line."""
-        if not self.pdf_viewer.doc:
+        if not self.pdf_viewer.pdf_path:
             messagebox.showwarning("Warning", "Please open a PDF file first.")
             return
         self.pdf_viewer.start_line_creation()
@@ -212,16 +252,19 @@ class VisualHAZOPApp(tk.Tk):
     
     def on_line_creation_ended(self):
         """Callback when line creation ends."""
+        self._update_action_state()
         self.update_status("Line creation finished")
     
     def on_node_selected(self, node):
         """Callback when a node is selected."""
         self.selected_node = node
+        self._update_action_state()
         self.update_status(f"Node selected: {node.name}")
     
     def on_node_deselected(self):
         """Callback when a node is deselected."""
         self.selected_node = None
+        self._update_action_state()
         self.update_status("Node deselected")
     
     def edit_selected_node_properties(self):
@@ -233,21 +276,8 @@ class VisualHAZOPApp(tk.Tk):
     
     def edit_node_properties(self, node):
         """Edit properties of a node."""
-        dialog = NodePropertiesDialog(self, node)
+        dialog = NodePropertiesDialog(self, node, on_ok=lambda node: self._schedule_redraw())
         self.wait_window(dialog)
-        if dialog.result:
-            # Update node properties
-            node.name = dialog.result['name']
-            node.color = dialog.result['color']
-            node.thickness = dialog.result['thickness']
-            node.transparency = dialog.result['transparency']
-            node.has_arrow = dialog.result['has_arrow']
-            node.font_size = dialog.result['font_size']
-            
-            self.pdf_viewer.render_page()
-            if self.spreadsheet_window and self.spreadsheet_window.winfo_exists():
-                self.spreadsheet_window.hazop_data = self.hazop_data
-                self.spreadsheet_window.refresh_data()
     
     def add_deviation_to_selected(self):
         """Add a deviation to the selected node."""
@@ -258,17 +288,16 @@ class VisualHAZOPApp(tk.Tk):
     
     def add_deviation(self, node):
         """Add a deviation to a node."""
+        from deviation_editor import DeviationEditor
+        
         deviation = Deviation()
         editor = DeviationEditor(self, deviation, on_save_callback=lambda dev: self.save_deviation(node, dev))
         self.wait_window(editor)
     
     def save_deviation(self, node, deviation):
         """Save a deviation to a node."""
-        node.deviations.append(deviation)
-        self.pdf_viewer.render_page()
-        if self.spreadsheet_window and self.spreadsheet_window.winfo_exists():
-            self.spreadsheet_window.hazop_data = self.hazop_data
-            self.spreadsheet_window.refresh_data()
+        self.hazop_data.add_deviation(node, deviation)
+        self._schedule_redraw()
     
     def manage_deviations(self):
         """Open deviation management dialog for selected node."""
@@ -276,24 +305,14 @@ class VisualHAZOPApp(tk.Tk):
             messagebox.showwarning("Warning", "Please select a node first.")
             return
         
-        def on_update():
-            self.pdf_viewer.render_page()
-            if self.spreadsheet_window and self.spreadsheet_window.winfo_exists():
-                self.spreadsheet_window.hazop_data = self.hazop_data
-                self.spreadsheet_window.refresh_data()
-        
-        dialog = DeviationListDialog(self, self.selected_node, on_update_callback=on_update)
+        from deviation_list_dialog import DeviationListDialog
+        dialog = DeviationListDialog(self, self.selected_node, self.hazop_data, on_update_callback=self._schedule_redraw)
         self.wait_window(dialog)
     
     def manage_deviations_for_node(self, node):
         """Open deviation management dialog for a specific node."""
-        def on_update():
-            self.pdf_viewer.render_page()
-            if self.spreadsheet_window and self.spreadsheet_window.winfo_exists():
-                self.spreadsheet_window.hazop_data = self.hazop_data
-                self.spreadsheet_window.refresh_data()
-        
-        dialog = DeviationListDialog(self, node, on_update_callback=on_update)
+        from deviation_list_dialog import DeviationListDialog
+        dialog = DeviationListDialog(self, node, self.hazop_data, on_update_callback=self._schedule_redraw)
         self.wait_window(dialog)
     
     def delete_selected_node(self):
@@ -302,35 +321,58 @@ class VisualHAZOPApp(tk.Tk):
             messagebox.showwarning("Warning", "Please select a node first.")
             return
         self.pdf_viewer.delete_node(self.selected_node)
-        if self.spreadsheet_window and self.spreadsheet_window.winfo_exists():
-            self.spreadsheet_window.hazop_data = self.hazop_data
-            self.spreadsheet_window.refresh_data()
+        self._schedule_redraw()
+    
+    def _schedule_redraw(self):
+        """Redraw the viewer and spreadsheet once when the event loop is next idle."""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._do_redraw)
+    
+    def _do_redraw(self):
+        """Run a redraw queued by _schedule_redraw."""
+        self._redraw_pending = False
+        self._update_action_state()
+        self.pdf_viewer.render_page()
+        self._sync_spreadsheet()
+    
+    def _sync_spreadsheet(self, force=False):
+        """Bring an open spreadsheet window up to date; unless forced, wait until it is shown."""
+        window = self.spreadsheet_window
+        if not (window and window.winfo_exists()):
+            return
+        if window.hazop_data is not self.hazop_data:
+            window.hazop_data = self.hazop_data
+        if force:
+            window.refresh_data()
+        else:
+            window.mark_dirty()
     
     def show_spreadsheet(self):
         """Show the spreadsheet view."""
         if self.spreadsheet_window and self.spreadsheet_window.winfo_exists():
-            # Update data reference and refresh
-            self.spreadsheet_window.hazop_data = self.hazop_data
-            self.spreadsheet_window.refresh_data()
+            self._sync_spreadsheet(force=True)
+            self.spreadsheet_window.deiconify()
             self.spreadsheet_window.lift()
         else:
+            from spreadsheet_view import SpreadsheetView
             self.spreadsheet_window = SpreadsheetView(self, self.hazop_data)
     
     def handle_page_up(self, event=None):
         """Handle PageUp key press."""
-        if self.pdf_viewer.doc:
+        if self.pdf_viewer.pdf_path:
             self.prev_page()
         return "break"
     
     def handle_page_down(self, event=None):
         """Handle PageDown key press."""
-        if self.pdf_viewer.doc:
+        if self.pdf_viewer.pdf_path:
             self.next_page()
         return "break"
     
     def next_page(self):
         """Go to next page."""
-        if self.pdf_viewer.doc:
+        if self.pdf_viewer.pdf_path:
             self.pdf_viewer.next_page()
             self.update_status(f"Page {self.pdf_viewer.current_page + 1} of {self.pdf_viewer.total_pages}")
             # Ensure PDF viewer has focus
@@ -338,7 +380,7 @@ class VisualHAZOPApp(tk.Tk):
     
     def prev_page(self):
         """Go to previous page."""
-        if self.pdf_viewer.doc:
+        if self.pdf_viewer.pdf_path:
             self.pdf_viewer.prev_page()
             self.update_status(f"Page {self.pdf_viewer.current_page + 1} of {self.pdf_viewer.total_pages}")
             # Ensure PDF viewer has focus
@@ -366,9 +408,24 @@ class VisualHAZOPApp(tk.Tk):
             self.spreadsheet_window.export_to_excel()
         else:
             # Create temporary spreadsheet window for export
+            from spreadsheet_view import SpreadsheetView
             temp_window = SpreadsheetView(self, self.hazop_data)
-            temp_window.export_to_excel()
-            temp_window.destroy()
+            temp_window.export_to_excel(close_when_done=True)
+    
+    def _update_action_state(self):
+        """Enable toolbar buttons and menu items only when their action can run."""
+        has_pdf = "normal" if self.pdf_viewer.pdf_path else "disabled"
+        has_node = "normal" if self.selected_node else "disabled"
+        has_nodes = "normal" if self.hazop_data.nodes else "disabled"
+        
+        self.create_line_button.config(state=has_pdf)
+        for button in self.node_buttons:
+            button.config(state=has_node)
+        
+        self.edit_menu.entryconfig("Create Line", state=has_pdf)
+        for label in ("Edit Node Properties", "Add Deviation", "Manage Deviations", "Delete Node"):
+            self.edit_menu.entryconfig(label, state=has_node)
+        self.tools_menu.entryconfig("Export to Excel", state=has_nodes)
     
     def update_status(self, message):
         """Update the status bar."""
@@ -378,10 +435,10 @@ class VisualHAZOPApp(tk.Tk):
 class NodePropertiesDialog(tk.Toplevel):
     """Dialog for editing node properties."""
     
-    def __init__(self, parent, node: Node):
+    def __init__(self, parent, node: Node, on_ok=None):
         super().__init__(parent)
         self.node = node
-        self.result = None
+        self.on_ok = on_ok
         
         self.title("Edit Node Properties")
         self.geometry("400x350")
@@ -412,32 +469,20 @@ class NodePropertiesDialog(tk.Toplevel):
         # Thickness
         ttk.Label(main_frame, text="Thickness:").grid(row=2, column=0, sticky=tk.W, pady=5)
         self.thickness_var = tk.IntVar(value=2)
-        thickness_frame = ttk.Frame(main_frame)
-        thickness_frame.grid(row=2, column=1, sticky=tk.EW, pady=5)
-        ttk.Scale(thickness_frame, from_=1, to=10, orient=tk.HORIZONTAL, 
-                  variable=self.thickness_var, command=self.update_thickness_label).pack(side=tk.LEFT, fill=tk.X, expand=True)
-        self.thickness_label = ttk.Label(thickness_frame, text="2")
-        self.thickness_label.pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(main_frame, from_=1, to=10, increment=1, width=8,
+                    textvariable=self.thickness_var).grid(row=2, column=1, sticky=tk.W, pady=5)
         
         # Transparency
         ttk.Label(main_frame, text="Transparency:").grid(row=3, column=0, sticky=tk.W, pady=5)
         self.transparency_var = tk.DoubleVar(value=0.7)
-        transparency_frame = ttk.Frame(main_frame)
-        transparency_frame.grid(row=3, column=1, sticky=tk.EW, pady=5)
-        ttk.Scale(transparency_frame, from_=0.0, to=1.0, orient=tk.HORIZONTAL,
-                  variable=self.transparency_var, command=self.update_transparency_label).pack(side=tk.LEFT, fill=tk.X, expand=True)
-        self.transparency_label = ttk.Label(transparency_frame, text="0.7")
-        self.transparency_label.pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(main_frame, from_=0.0, to=1.0, increment=0.05, format="%.2f", width=8,
+                    textvariable=self.transparency_var).grid(row=3, column=1, sticky=tk.W, pady=5)
         
         # Font size
         ttk.Label(main_frame, text="Font Size:").grid(row=4, column=0, sticky=tk.W, pady=5)
         self.font_size_var = tk.IntVar(value=12)
-        font_frame = ttk.Frame(main_frame)
-        font_frame.grid(row=4, column=1, sticky=tk.EW, pady=5)
-        ttk.Scale(font_frame, from_=8, to=24, orient=tk.HORIZONTAL,
-                  variable=self.font_size_var, command=self.update_font_size_label).pack(side=tk.LEFT, fill=tk.X, expand=True)
-        self.font_size_label = ttk.Label(font_frame, text="12")
-        self.font_size_label.pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(main_frame, from_=8, to=24, increment=1, width=8,
+                    textvariable=self.font_size_var).grid(row=4, column=1, sticky=tk.W, pady=5)
         
         # Arrow
         self.has_arrow_var = tk.BooleanVar(value=True)
@@ -460,9 +505,6 @@ class NodePropertiesDialog(tk.Toplevel):
         self.transparency_var.set(self.node.transparency)
         self.font_size_var.set(self.node.font_size)
         self.has_arrow_var.set(self.node.has_arrow)
-        self.update_thickness_label(self.node.thickness)
-        self.update_transparency_label(self.node.transparency)
-        self.update_font_size_label(self.node.font_size)
     
     def choose_color(self):
         """Choose a color."""
@@ -470,28 +512,24 @@ class NodePropertiesDialog(tk.Toplevel):
         if color:
             self.color_label.config(bg=color)
     
-    def update_thickness_label(self, value):
-        """Update thickness label."""
-        self.thickness_label.config(text=str(int(float(value))))
-    
-    def update_transparency_label(self, value):
-        """Update transparency label."""
-        self.transparency_label.config(text=f"{float(value):.2f}")
-    
-    def update_font_size_label(self, value):
-        """Update font size label."""
-        self.font_size_label.config(text=str(int(float(value))))
-    
     def ok(self):
-        """Save and close."""
-        self.result = {
-            'name': self.name_entry.get(),
-            'color': self.color_label.cget('bg'),
-            'thickness': int(self.thickness_var.get()),
-            'transparency': float(self.transparency_var.get()),
-            'has_arrow': self.has_arrow_var.get(),
-            'font_size': int(self.font_size_var.get())
-        }
+        """Apply the values to the node and close."""
+        try:
+            thickness = min(max(int(self.thickness_var.get()), 1), 10)
+            transparency = min(max(float(self.transparency_var.get()), 0.0), 1.0)
+            font_size = min(max(int(self.font_size_var.get()), 8), 24)
+        except tk.TclError:
+            # Spinbox text was typed in and is not a number
+            messagebox.showwarning("Warning", "Thickness, transparency and font size must be numbers.", parent=self)
+            return
+        self.node.name = self.name_entry.get()
+        self.node.color = self.color_label.cget('bg')
+        self.node.thickness = thickness
+        self.node.transparency = transparency
+        self.node.has_arrow = self.has_arrow_var.get()
+        self.node.font_size = font_size
+        if self.on_ok:
+            self.on_ok(self.node)
         self.destroy()
     
     def cancel(self):
@@ -1,12 +1,115 @@
 """
 Data models for HAZOP analysis nodes and deviations.
 """
-from dataclasses import dataclass, field, asdict
-from typing import List, Optional
+from array import array
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain, count
+from typing import Dict, List, Optional, Tuple
 import json
+import os
 
+import numpy as np
 
-@dataclass
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+
+@lru_cache(maxsize=256)
+def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """Convert a "#RRGGBB" color to an RGB tuple; nodes share few colors, so results are cached."""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+class PointList:
+    """Sequence of (x, y) points packed into one flat array of doubles."""
+    __slots__ = ('coords', '_bbox', '_segments', 'version')
+    # Source of version stamps, so no two states of any PointLists share one
+    _stamps = count(1)
+    
+    def __init__(self, points=()):
+        self.coords = array('d', chain.from_iterable(points))
+        self._changed()
+    
+    def _changed(self):
+        # Drop geometry cached for the old points
+        self._bbox = None
+        self._segments = None
+        # Lets spatial indexes tell when these points changed
+        self.version = next(PointList._stamps)
+    
+    def __len__(self):
+        return len(self.coords) // 2
+    
+    def _offset(self, index):
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("point index out of range")
+        return 2 * index
+    
+    def __getitem__(self, index):
+        i = self._offset(index)
+        return (self.coords[i], self.coords[i + 1])
+    
+    def __setitem__(self, index, point):
+        i = self._offset(index)
+        self.coords[i], self.coords[i + 1] = point
+        self._changed()
+    
+    def __iter__(self):
+        it = iter(self.coords)
+        return zip(it, it)
+    
+    def __eq__(self, other):
+        if not isinstance(other, PointList):
+            return NotImplemented
+        return self.coords == other.coords
+    
+    def __repr__(self):
+        return f"PointList({list(self)!r})"
+    
+    def append(self, point):
+        self.coords.extend(point)
+        self._changed()
+    
+    def insert(self, index, point):
+        # Like list.insert, out-of-range indices clamp to the ends
+        index = max(0, min(len(self), index if index >= 0 else index + len(self)))
+        self.coords[2 * index:2 * index] = array('d', point)
+        self._changed()
+    
+    def pop(self, index=-1):
+        i = self._offset(index)
+        point = (self.coords[i], self.coords[i + 1])
+        del self.coords[i:i + 2]
+        self._changed()
+        return point
+    
+    def bbox(self):
+        """Return (min_x, min_y, max_x, max_y) of the points, or None if there are none."""
+        if self._bbox is None and self.coords:
+            xs = self.coords[0::2]
+            ys = self.coords[1::2]
+            self._bbox = (min(xs), min(ys), max(xs), max(ys))
+        return self._bbox
+    
+    def segments(self):
+        """Return (starts, deltas, lengths, midpoints) arrays for the segments between consecutive points."""
+        if self._segments is None:
+            # A copy rather than a view, which would stop coords from being resized
+            pts = np.array(self.coords).reshape(-1, 2)
+            deltas = np.diff(pts, axis=0)
+            self._segments = (pts[:-1], deltas, np.hypot(deltas[:, 0], deltas[:, 1]),
+                              pts[:-1] + deltas / 2)
+        return self._segments
+
+
+@dataclass(slots=True)
 class Deviation:
     """Represents a HAZOP deviation/note attached to a node."""
     deviation: str = ""
@@ -16,29 +119,75 @@ class Deviation:
     recommendations: List[str] = field(default_factory=list)
     comments: str = ""
     minimized: bool = False
+    # (source text, truncated text) for list displays; left out of to_dict so it is never saved
+    _display_cache: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    
+    def display_text(self, index: int) -> str:
+        """Return the text shown for this deviation in lists, truncated to 50 characters."""
+        if not self.deviation:
+            return f"Deviation {index+1}"
+        cache = self._display_cache
+        if cache is None or cache[0] is not self.deviation:
+            text = self.deviation
+            if len(text) > 50:
+                text = text[:47] + "..."
+            cache = self._display_cache = (self.deviation, text)
+        return cache[1]
+    
+    def snapshot(self) -> tuple:
+        """Return an immutable copy of the editable fields, for change detection."""
+        return (self.deviation, tuple(self.causes), self.consequence,
+                tuple(self.safeguards), tuple(self.recommendations), self.comments)
     
     def to_dict(self):
-        return asdict(self)
+        # Built by hand: asdict() deep-copies every list, and the result is only serialized
+        return {
+            'deviation': self.deviation,
+            'causes': self.causes,
+            'consequence': self.consequence,
+            'safeguards': self.safeguards,
+            'recommendations': self.recommendations,
+            'comments': self.comments,
+            'minimized': self.minimized
+        }
     
     @classmethod
     def from_dict(cls, data):
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Node:
     """Represents a line/node in the HAZOP analysis."""
+    # eq=False: nodes compare by identity, since two lines with the same
+    # properties are still different nodes
     name: str = ""
     color: str = "#FF0000"  # Default red
     thickness: int = 2
     transparency: float = 0.7
     has_arrow: bool = True
     font_size: int = 12
-    points: List[tuple] = field(default_factory=list)  # List of (x, y) coordinates
+    points: PointList = field(default_factory=PointList)  # (x, y) coordinates
     deviations: List[Deviation] = field(default_factory=list)
     page_number: int = 0
+    # (color, transparency, rgb, rgba) for drawing; left out of to_dict so it is never saved
+    _render_cache: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
     
-    def to_dict(self):
+    def __post_init__(self):
+        if not isinstance(self.points, PointList):
+            self.points = PointList(self.points)
+    
+    def render_descriptor(self) -> tuple:
+        """Return the (rgb, rgba) drawing colors, rebuilt only after color or transparency change."""
+        cache = self._render_cache
+        if cache is None or cache[0] is not self.color or cache[1] != self.transparency:
+            rgb = hex_to_rgb(self.color)
+            cache = self._render_cache = (self.color, self.transparency,
+                                          rgb, (*rgb, int(255 * self.transparency)))
+        return cache[2], cache[3]
+    
+    def to_dict(self, shallow=False):
+        # shallow leaves deviations as objects for the JSON default hook to encode
         return {
             'name': self.name,
             'color': self.color,
@@ -46,25 +195,26 @@ class Node:
             'transparency': self.transparency,
             'has_arrow': self.has_arrow,
             'font_size': self.font_size,
-            'points': self.points,
-            'deviations': [d.to_dict() for d in self.deviations],
+            'points': list(self.points),
+            'deviations': self.deviations if shallow else [d.to_dict() for d in self.deviations],
             'page_number': self.page_number
         }
     
     @classmethod
     def from_dict(cls, data):
-        node = cls(
-            name=data.get('name', ''),
-            color=data.get('color', '#FF0000'),
-            thickness=data.get('thickness', 2),
-            transparency=data.get('transparency', 0.7),
-            has_arrow=data.get('has_arrow', True),
-            font_size=data.get('font_size', 12),
-            points=data.get('points', []),
-            page_number=data.get('page_number', 0)
+        # Positional in field order, with deviations built inline rather than assigned after
+        get = data.get
+        return cls(
+            get('name', ''),
+            get('color', '#FF0000'),
+            get('thickness', 2),
+            get('transparency', 0.7),
+            get('has_arrow', True),
+            get('font_size', 12),
+            get('points', ()),
+            [Deviation.from_dict(d) for d in get('deviations', ())],
+            get('page_number', 0)
         )
-        node.deviations = [Deviation.from_dict(d) for d in data.get('deviations', [])]
-        return node
 
 
 class HAZOPData:
@@ -72,36 +222,115 @@ class HAZOPData:
     def __init__(self, pdf_path: str = ""):
         self.pdf_path = pdf_path
         self.nodes: List[Node] = []
+        # page_number -> nodes on that page, kept in step with self.nodes
+        self._by_page: Dict[int, List[Node]] = {}
+        # Total deviations across all nodes; kept current by the add/remove methods
+        self._deviation_count = 0
+        # Bumped whenever nodes are added or removed
+        self._node_version = 0
+    
+    @property
+    def deviation_count(self) -> int:
+        return self._deviation_count
+    
+    @property
+    def node_version(self) -> int:
+        return self._node_version
     
     def add_node(self, node: Node):
         self.nodes.append(node)
+        self._by_page.setdefault(node.page_number, []).append(node)
+        self._deviation_count += len(node.deviations)
+        self._node_version += 1
     
     def remove_node(self, node: Node):
         if node in self.nodes:
             self.nodes.remove(node)
+            page_nodes = self._by_page[node.page_number]
+            page_nodes.remove(node)
+            if not page_nodes:
+                del self._by_page[node.page_number]
+            self._deviation_count -= len(node.deviations)
+            self._node_version += 1
+    
+    def add_deviation(self, node: Node, deviation: Deviation):
+        node.deviations.append(deviation)
+        self._deviation_count += 1
+    
+    def remove_deviation(self, node: Node, deviation: Deviation):
+        # Match by identity: two deviations with the same text compare equal
+        for i, d in enumerate(node.deviations):
+            if d is deviation:
+                del node.deviations[i]
+                self._deviation_count -= 1
+                return
     
     def get_nodes_for_page(self, page_number: int) -> List[Node]:
-        return [node for node in self.nodes if node.page_number == page_number]
+        return self._by_page.get(page_number, [])
     
-    def to_dict(self):
+    def pages(self) -> List[Tuple[int, List[Node]]]:
+        """Return (page number, nodes) for each page that has nodes, in page order."""
+        return sorted(self._by_page.items())
+    
+    def _rebuild_page_index(self):
+        self._node_version += 1
+        self._by_page = {}
+        for node in self.nodes:
+            self._by_page.setdefault(node.page_number, []).append(node)
+    
+    def to_dict(self, shallow=False):
         return {
             'pdf_path': self.pdf_path,
-            'nodes': [node.to_dict() for node in self.nodes]
+            'nodes': self.nodes if shallow else [node.to_dict() for node in self.nodes]
         }
     
     def to_json(self, filepath: str):
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        # Objects are encoded one level at a time through _json_default, so the
+        # full dict tree is never built in memory alongside the model.
+        # The data goes to a temporary file that replaces the target only once it
+        # is fully on disk, so a failed save never leaves a truncated file behind.
+        tmp_path = filepath + '.tmp'
+        try:
+            if orjson is not None:
+                with open(tmp_path, 'wb') as f:
+                    f.write(orjson.dumps(self, default=_json_default,
+                                         option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATACLASS))
+                    f.flush()
+                    os.fsync(f.fileno())
+            else:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self, f, default=_json_default, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
     
     @classmethod
     def from_dict(cls, data):
         hazop_data = cls(pdf_path=data.get('pdf_path', ''))
         hazop_data.nodes = [Node.from_dict(n) for n in data.get('nodes', [])]
+        hazop_data._rebuild_page_index()
+        hazop_data._deviation_count = sum(len(n.deviations) for n in hazop_data.nodes)
         return hazop_data
     
     @classmethod
     def from_json(cls, filepath: str):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if orjson is not None:
+            with open(filepath, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
         return cls.from_dict(data)
 
+
+def _json_default(obj):
+    """Encode model objects for the json/orjson default hooks."""
+    if isinstance(obj, Deviation):
+        return obj.to_dict()
+    if isinstance(obj, (Node, HAZOPData)):
+        return obj.to_dict(shallow=True)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -5,9 +5,44 @@ import tkinter as tk
 from tkinter import ttk, colorchooser, messagebox
 from PIL import Image, ImageTk, ImageDraw, ImageFont
 import fitz  # PyMuPDF
-from models import Node, Deviation, HAZOPData
+import numpy as np
+from models import Node, Deviation, HAZOPData, PointList
+from geom_kernels import scan_polyline
 import math
-import io
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+try:
+    from rtree import index as rtree_index  # Optional: spatial index for hit-testing
+except ImportError:
+    rtree_index = None
+
+
+@lru_cache(maxsize=64)
+def get_font(size):
+    """Load the label font at a size, parsing the TTF only once per size."""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except (OSError, ValueError):  # Font not installed, or size too small
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=128)
+def render_label(text, font_size, color_rgb, rotated):
+    """Render a node name on a translucent white box, cached since names rarely change."""
+    font = get_font(font_size)
+    
+    # Measure on a scratch RGBA image so the result matches drawing on the overlay
+    bbox = ImageDraw.Draw(Image.new("RGBA", (1, 1))).textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    
+    text_img = Image.new("RGBA", (text_width + 4, text_height + 4), (255, 255, 255, 200))
+    ImageDraw.Draw(text_img).text((2, 2), text, fill=(*color_rgb, 255), font=font)
+    if rotated:
+        text_img = text_img.rotate(90, expand=True)
+    return text_img
 
 
 class PDFViewer(tk.Canvas):
@@ -18,15 +53,45 @@ class PDFViewer(tk.Canvas):
         self.parent = parent
         # Make canvas focusable for keyboard events
         self.config(takefocus=True)
-        self.doc = None
+        self.pdf_path = None  # The document itself is only opened on the render thread
         self.current_page = 0
         self.total_pages = 0
         self.scale = 1.0
         self.page_image = None
         self.overlay_image = None
-        self.photo = None
+        self.overlay_draw = None  # ImageDraw for overlay_image, made once per buffer
+        self.photo = None  # Page layer PhotoImage
+        self.overlay_photo = None  # Transparent overlay layer PhotoImage drawn over the page
+        self.overlay_bbox = None  # Bounding box of everything drawn on overlay_image
+        self.page_photo_source = None  # page_image the page layer was made from
+        self.page_photo_size = None
+        self.display_size = (0, 0)
+        self.overlay_key = None  # View state the current overlay was drawn for
+        self.page_clip = None  # (page number, zoom, pixel rect) rasterized when zoomed in far
+        self.page_origin = (0, 0)  # Where page_image sits within the whole page, in pixels
         self.hazop_data = hazop_data if hazop_data is not None else HAZOPData()
         
+        # Rasterized pages keyed by (page number, render zoom), least recently used first
+        self.page_cache = OrderedDict()
+        self.page_cache_size = 8
+        # Page layer PhotoImages keyed by (id of source image, display size), least recently
+        # used first; each entry keeps its source so a reused id is never mistaken for it
+        self.page_photos = OrderedDict()
+        self.page_photos_size = 3
+        
+        # Pages are rasterized on one background thread; _render_token tells the
+        # latest request apart from superseded ones
+        self._render_executor = ThreadPoolExecutor(max_workers=1)
+        self._render_future = None
+        self._render_key = None
+        self._render_token = 0
+        self._worker_doc = None  # The open PDF, used only on the render thread
+        self._worker_renders = 0  # Renders since MuPDF's store was last trimmed
+        # Whole-page renders of the neighbouring pages, queued behind the visible one
+        self._prefetch_futures = {}
+        self._prefetch_after = None
+        self._prefetch_idle = None  # Timer that queues them once the view has settled
+        
         # Zoom and pan state
         self.zoom_level = 1.0  # Current zoom level (1.0 = 100%)
         self.pan_x = 0  # Pan offset in screen coordinates
@@ -35,6 +100,9 @@ class PDFViewer(tk.Canvas):
         self.fit_to_window = True  # Whether to fit to window initially
         self.pdf_page_width = 0  # Original PDF page width (at base_zoom)
         self.pdf_page_height = 0  # Original PDF page height (at base_zoom)
+        # (width, height) of every page in PDF points, read when the PDF is loaded so
+        # the Tk thread never has to touch the document
+        self.page_sizes = []
         
         # Panning state
         self.panning = False
@@ -43,12 +111,13 @@ class PDFViewer(tk.Canvas):
         
         # Line creation state
         self.creating_line = False
-        self.current_line_points = []
-        self.current_node = None
+        self.current_node = None  # Node being created; its PointList holds the clicked points
         
         # Selection state
         self.selected_node = None
         self.hover_node = None
+        self._node_index = None  # (R-tree over node bounding boxes, the nodes it indexes)
+        self._node_index_key = None  # Data, page and versions the index was built for
         
         # Point editing state
         self.editing_node = None  # Node being edited
@@ -65,6 +134,10 @@ class PDFViewer(tk.Canvas):
         # Preview while creating a new line (from last clicked point to cursor)
         self.creating_preview_pos = None
         
+        # Pending after() id for the resize re-render, so bursts collapse into one
+        self._configure_after = None
+        self._zoom_render_pending = False  # A zoom render is queued for the next frame
+        
         # Bind events
         self.bind("<Button-1>", self.on_click)
         self.bind("<Double-Button-1>", self.on_double_click)
@@ -89,69 +162,114 @@ class PDFViewer(tk.Canvas):
         self.focus_set()
         
         # Font for text rendering
-        try:
-            self.default_font = ImageFont.truetype("arial.ttf", 12)
-        except:
-            self.default_font = ImageFont.load_default()
+        self.default_font = get_font(12)
+    
+    @property
+    def effective_scale(self):
+        """Screen pixels per PDF point: screen = pdf * effective_scale + pan."""
+        return self.scale * self.base_zoom * self.zoom_level
     
     def load_pdf(self, filepath: str):
         """Load a PDF file."""
+        # Renders queued for the previous document are dropped, and one still running is ignored
+        if self._render_future is not None:
+            self._render_future.cancel()
+        self._render_future = None
+        self._render_token += 1
+        self._render_key = None
+        self.cancel_prefetch()
         try:
-            self.doc = fitz.open(filepath)
-            self.total_pages = len(self.doc)
-            self.current_page = 0
-            if self.hazop_data:
-                self.hazop_data.pdf_path = filepath
-            self.render_page()
-            # Ensure focus for keyboard events
-            self.focus_set()
+            # Opened on the render thread, the only one that uses MuPDF; waiting for it
+            # also lets a render already in progress finish first
+            page_sizes = self._render_executor.submit(self._open_worker, filepath).result()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load PDF: {str(e)}")
+            return
+        
+        self.pdf_path = filepath
+        self.page_sizes = page_sizes
+        self.page_cache.clear()
+        self.page_photos.clear()
+        self.total_pages = len(page_sizes)
+        self.current_page = 0
+        if self.hazop_data:
+            self.hazop_data.pdf_path = filepath
+        self.render_page()
+        # Ensure focus for keyboard events
+        self.focus_set()
+    
+    def _open_worker(self, path):
+        """Open a PDF on the render thread in place of the previous one, returning its page sizes."""
+        doc = fitz.open(path)
+        page_sizes = [(page.rect.width, page.rect.height) for page in doc]
+        if self._worker_doc is not None:
+            self._worker_doc.close()
+        self._worker_doc = doc
+        # Start the new document with MuPDF's store and warning log emptied
+        fitz.TOOLS.store_shrink(100)
+        fitz.TOOLS.mupdf_warnings(reset=True)
+        return page_sizes
     
     def load_data(self, hazop_data: HAZOPData):
         """Load HAZOP data."""
         self.hazop_data = hazop_data
         self.render_page()
     
-    def render_page(self):
-        """Render the current PDF page with overlays."""
-        if not self.doc:
+    def render_page(self, dirty=True):
+        """Render the current PDF page with overlays.
+        
+        Pass dirty=False when only the view (pan, zoom, page, size) changed, so the
+        overlay can be reused if nothing drawn on it changed.
+        """
+        if not self.pdf_path:
             return
         
-        # Get page
-        page = self.doc[self.current_page]
+        # Page size in PDF points; MuPDF is only ever used on the render thread
+        page_number = self.current_page
+        page_width, page_height = self.page_sizes[page_number]
         
         # Store original page dimensions (in PDF points) for coordinate conversion
         if self.pdf_page_width == 0:
-            # Get page rect in PDF points
-            page_rect = page.rect
-            self.pdf_page_width = page_rect.width
-            self.pdf_page_height = page_rect.height
+            self.pdf_page_width = page_width
+            self.pdf_page_height = page_height
         
         # Calculate zoom for PDF rendering
         pdf_zoom = self.base_zoom * self.zoom_level
-        mat = fitz.Matrix(pdf_zoom, pdf_zoom)
-        pix = page.get_pixmap(matrix=mat)
-        
-        # Convert to PIL Image
-        img_data = pix.tobytes("ppm")
-        self.page_image = Image.open(io.BytesIO(img_data)).convert("RGBA")
-        
-        # Create overlay at same size as page image
-        self.overlay_image = Image.new("RGBA", self.page_image.size, (0, 0, 0, 0))
-        self.draw_overlays()
-        
-        # Combine images
-        combined = Image.alpha_composite(self.page_image, self.overlay_image)
-        
-        # Calculate display size
         canvas_width = self.winfo_width()
         canvas_height = self.winfo_height()
+        fit = self.fit_to_window and self.zoom_level == 1.0
+        
+        # When zoomed in, only the part of the page around the view may be rasterized
+        clip = None
+        if not fit and canvas_width > 1 and canvas_height > 1:
+            clip = self.get_page_clip(page_number, pdf_zoom, canvas_width, canvas_height)
+        page_image = self.get_page_image(page_number, pdf_zoom, clip)
+        stand_in = False
+        if page_image is None and clip is None:
+            # Until the render arrives, stretch another zoom of this page from the cache
+            page_image = self.get_stand_in_image(page_number, pdf_zoom)
+            stand_in = page_image is not None
+        if page_image is None:
+            # Keep showing the previous frame; _poll_render renders again once the page is ready
+            if dirty:
+                self.overlay_key = None
+            return
+        self.page_image = page_image
+        self.page_origin = clip[:2] if clip else (0, 0)
+        if clip is None and not stand_in:
+            self.schedule_prefetch(pdf_zoom)
+        
+        # Calculate display size
+        if stand_in:
+            display_width = round(page_width * pdf_zoom)
+            display_height = round(page_height * pdf_zoom)
+        else:
+            display_width, display_height = self.page_image.size
         
         if canvas_width > 1 and canvas_height > 1:
-            if self.fit_to_window and self.zoom_level == 1.0:
+            if fit:
                 # Fit to window mode
-                img_ratio = combined.width / combined.height
+                img_ratio = display_width / display_height
                 canvas_ratio = canvas_width / canvas_height
                 
                 if img_ratio > canvas_ratio:
@@ -161,143 +279,292 @@ class PDFViewer(tk.Canvas):
                     display_height = canvas_height
                     display_width = int(canvas_height * img_ratio)
                 
-                combined = combined.resize((display_width, display_height), Image.Resampling.LANCZOS)
-                # Scale: pixels per PDF point, accounting for current zoom
-                # In fit mode: zoom_level = 1.0, so scale = display_width / (pdf_width * base_zoom)
-                self.scale = display_width / (self.pdf_page_width * self.base_zoom * self.zoom_level)
                 self.pan_x = 0
                 self.pan_y = 0
+            # Zoomed mode - the page is already at the correct size from PDF rendering
+            # Scale: pixels per PDF point, accounting for current zoom
+            # screen = pdf * scale * base_zoom * zoom_level, so
+            # scale = display_width / (pdf_width * base_zoom * zoom_level)
+            # A clipped image is rendered at exactly that zoom, so the scale is 1
+            if clip:
+                self.scale = 1.0
             else:
-                # Zoomed mode - combined is already at the correct size from PDF rendering
-                # No need to resize, just use it as is
-                display_width = combined.width
-                display_height = combined.height
-                # Scale: pixels per PDF point, accounting for current zoom
-                # display_width = pdf_width * base_zoom * zoom_level
-                # So scale = display_width / (pdf_width * base_zoom * zoom_level) = 1.0
-                # But we need: screen = pdf * scale * base_zoom * zoom_level
-                # So scale should be: display_width / (pdf_width * base_zoom * zoom_level)
                 self.scale = display_width / (self.pdf_page_width * self.base_zoom * self.zoom_level)
         else:
             self.scale = 1.0
+        self.display_size = (display_width, display_height)
+        
+        # The page layer only changes with the page, zoom or window size, so
+        # overlay-only redraws never touch it
+        if self.page_photo_source is not self.page_image or self.page_photo_size != self.display_size:
+            key = (id(self.page_image), self.display_size)
+            cached = self.page_photos.get(key)
+            if cached is not None and cached[0] is self.page_image:
+                # Recently shown at this size (e.g. zooming back), so skip the upload
+                self.page_photos.move_to_end(key)
+                self.photo = cached[1]
+            else:
+                image = self.page_image
+                if image.size != self.display_size:
+                    # A stand-in is replaced within moments, so favour speed over quality
+                    resample = Image.Resampling.BILINEAR if stand_in else Image.Resampling.LANCZOS
+                    image = image.resize(self.display_size, resample)
+                
+                photo = None
+                if len(self.page_photos) >= self.page_photos_size:
+                    _, (_, oldest) = self.page_photos.popitem(last=False)
+                    # Same size: write into the evicted Tk image instead of making a new one
+                    if (oldest.width(), oldest.height()) == self.display_size:
+                        oldest.paste(image)
+                        photo = oldest
+                if photo is None:
+                    photo = ImageTk.PhotoImage(image)
+                self.page_photos[key] = (self.page_image, photo)
+                self.photo = photo
+            self.show_layer("page", self.photo)
+            self.page_photo_source = self.page_image
+            self.page_photo_size = self.display_size
+        
+        self.quick_redraw(dirty)
+    
+    def show_layer(self, tag, photo):
+        """Show a photo in the canvas image item for a layer, creating the item the first time."""
+        if self.find_withtag(tag):
+            self.itemconfig(tag, image=photo)
+        else:
+            self.create_image(0, 0, anchor=tk.NW, image=photo, tags=tag)
+    
+    def get_page_clip(self, page_number, pdf_zoom, canvas_width, canvas_height):
+        """Return the pixel rect of the page to rasterize at a zoom, or None for the whole page.
         
-        # Convert to PhotoImage
-        self.photo = ImageTk.PhotoImage(combined)
+        Once the page is larger than four canvases, only the view plus half a canvas on
+        each side is rendered. The rect is kept while the view stays inside it, so
+        panning within it reuses the same image.
+        """
+        page_width, page_height = self.page_sizes[page_number]
+        page_width *= pdf_zoom
+        page_height *= pdf_zoom
+        if page_width * page_height <= 4 * canvas_width * canvas_height:
+            return None
         
-        # Clear and draw
-        self.delete("all")
+        # Visible part of the page in page pixels
+        view_x0 = min(max(-self.pan_x, 0), page_width)
+        view_y0 = min(max(-self.pan_y, 0), page_height)
+        view_x1 = min(max(canvas_width - self.pan_x, 0), page_width)
+        view_y1 = min(max(canvas_height - self.pan_y, 0), page_height)
+        
+        if self.page_clip and self.page_clip[:2] == (page_number, round(pdf_zoom, 3)):
+            x0, y0, x1, y1 = self.page_clip[2]
+            if x0 <= view_x0 and y0 <= view_y0 and view_x1 <= x1 and view_y1 <= y1:
+                return self.page_clip[2]
+        
+        clip = (max(0, int(view_x0 - canvas_width / 2)),
+                max(0, int(view_y0 - canvas_height / 2)),
+                min(math.ceil(page_width), int(view_x1 + canvas_width / 2) + 1),
+                min(math.ceil(page_height), int(view_y1 + canvas_height / 2) + 1))
+        self.page_clip = (page_number, round(pdf_zoom, 3), clip)
+        return clip
+    
+    def get_page_image(self, page_number, pdf_zoom, clip=None):
+        """Return the rasterized page as an RGB image, or None while it renders in the background.
         
-        # Apply pan offset
-        x_pos = self.pan_x
-        y_pos = self.pan_y
+        clip is an optional (x0, y0, x1, y1) rect in pixels at pdf_zoom to render
+        instead of the whole page.
+        """
+        # Rounded so zooming in and back out lands on the same key despite float drift
+        key = (page_number, round(pdf_zoom, 3), clip)
+        image = self.page_cache.get(key)
+        if image is not None:
+            self.page_cache.move_to_end(key)
+            return image
+        
+        if self._render_key != key:
+            if self._render_future is not None:
+                self._render_future.cancel()  # Dropped if the worker has not started it yet
+            self._render_token += 1
+            self._render_key = key
+            # A neighbour render already queued or running is taken over rather than repeated
+            future = self._prefetch_futures.pop(key, None)
+            if future is None or future.cancelled():
+                future = self._render_executor.submit(self._render_worker, *key)
+            self._render_future = future
+            self.after(20, self._poll_render, self._render_token)
+        return None
+    
+    def schedule_prefetch(self, pdf_zoom):
+        """Prefetch the neighbouring pages once the view has been still for a moment."""
+        if self._prefetch_idle is not None:
+            self.after_cancel(self._prefetch_idle)
+        self._prefetch_idle = self.after(400, self.prefetch_neighbours, pdf_zoom)
+    
+    def prefetch_neighbours(self, pdf_zoom):
+        """Render the pages either side of the current one in the background, so paging is instant."""
+        self._prefetch_idle = None
+        if self._render_future is not None and not self._render_future.done():
+            # Never queue behind a render the user is waiting for
+            self.schedule_prefetch(pdf_zoom)
+            return
+        for page_number in (self.current_page + 1, self.current_page - 1):
+            key = (page_number, round(pdf_zoom, 3), None)
+            if (0 <= page_number < self.total_pages and key not in self.page_cache
+                    and key not in self._prefetch_futures and key != self._render_key):
+                self._prefetch_futures[key] = self._render_executor.submit(
+                    self._render_worker, *key)
+        if self._prefetch_futures and self._prefetch_after is None:
+            self._prefetch_after = self.after(50, self._poll_prefetch)
+    
+    def cancel_prefetch(self, keep_near=None):
+        """Drop queued neighbour renders, except those within one page of keep_near."""
+        if self._prefetch_idle is not None:
+            self.after_cancel(self._prefetch_idle)
+            self._prefetch_idle = None
+        for key in list(self._prefetch_futures):
+            if keep_near is None or abs(key[0] - keep_near) > 1:
+                self._prefetch_futures.pop(key).cancel()
+    
+    def _poll_prefetch(self):
+        """Move finished neighbour renders into the page cache."""
+        self._prefetch_after = None
+        for key, future in list(self._prefetch_futures.items()):
+            if future.done():
+                del self._prefetch_futures[key]
+                if not future.cancelled() and future.exception() is None:
+                    self.page_cache[key] = future.result()
+        self.trim_page_cache()
+        if self._prefetch_futures:
+            self._prefetch_after = self.after(50, self._poll_prefetch)
+    
+    def trim_page_cache(self):
+        """Drop pages more than two away from the current one, then the least recently used."""
+        for cached_key in list(self.page_cache):
+            if abs(cached_key[0] - self.current_page) > 2:
+                del self.page_cache[cached_key]
+        while len(self.page_cache) > self.page_cache_size:
+            self.page_cache.popitem(last=False)
+    
+    def get_stand_in_image(self, page_number, pdf_zoom):
+        """Return the cached whole-page render at the zoom nearest pdf_zoom, or None."""
+        keys = [key for key in self.page_cache if key[0] == page_number and key[2] is None]
+        if not keys:
+            return None
+        return self.page_cache[min(keys, key=lambda key: abs(key[1] - pdf_zoom))]
+    
+    def _render_worker(self, page_number, pdf_zoom, clip):
+        """Rasterize a page of the open PDF on the render thread."""
+        page = self._worker_doc[page_number]
         
-        self.create_image(x_pos, y_pos, anchor=tk.NW, image=self.photo)
+        mat = fitz.Matrix(pdf_zoom, pdf_zoom)
+        if clip:
+            x0, y0, x1, y1 = clip
+            pix = page.get_pixmap(matrix=mat, alpha=False,
+                                  clip=fitz.Rect(x0 / pdf_zoom, y0 / pdf_zoom, x1 / pdf_zoom, y1 / pdf_zoom))
+        else:
+            pix = page.get_pixmap(matrix=mat)
+        
+        # Wrap the raw samples directly rather than round-tripping through PPM
+        image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        pix = None  # Release MuPDF's buffer now that PIL has its own copy
+        # Keep MuPDF's own resource store from growing alongside our cache, trimming only
+        # part of it now and then so fonts and images shared between pages stay decoded
+        self._worker_renders += 1
+        if self._worker_renders >= 20:
+            self._worker_renders = 0
+            fitz.TOOLS.store_shrink(80)
+        return image
+    
+    def _poll_render(self, token):
+        """Cache a finished background render and redraw with it."""
+        if token != self._render_token:
+            return  # Superseded by a newer request or another document
+        if not self._render_future.done():
+            self.after(20, self._poll_render, token)
+            return
+        
+        future, key = self._render_future, self._render_key
+        self._render_future = None
+        self._render_key = None
+        try:
+            image = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to render page: {str(e)}")
+            return
         
-        # Store image reference to prevent garbage collection
-        self.image_ref = self.photo
+        self.page_cache[key] = image
+        self.trim_page_cache()
+        self.render_page(dirty=False)
     
     def draw_overlays(self):
         """Draw all node overlays on the overlay image."""
         if not self.overlay_image:
             return
         
-        draw = ImageDraw.Draw(self.overlay_image)
+        draw = self.overlay_draw
         nodes = self.hazop_data.get_nodes_for_page(self.current_page)
         
-        # Calculate scale factor to convert PDF coordinates to rendered image coordinates
-        # The overlay_image is the same size as page_image, which is rendered at base_zoom * zoom_level
-        # So we need to scale PDF coordinates by base_zoom * zoom_level
-        render_scale = self.base_zoom * self.zoom_level
+        # Calculate scale factor to convert PDF coordinates to overlay pixels
+        # The overlay_image is drawn at display size, so this includes the fit-to-window scale
+        render_scale = self.effective_scale
+        
+        # Area covered by the overlay in PDF coordinates; when zoomed in this is only the
+        # rasterized clip, so most lines can be skipped without drawing anything
+        origin_x, origin_y = self.page_origin
+        width, height = self.overlay_image.size
+        view_x0, view_y0 = origin_x / render_scale, origin_y / render_scale
+        view_x1, view_y1 = (origin_x + width) / render_scale, (origin_y + height) / render_scale
         
         for node in nodes:
             if len(node.points) < 2:
                 continue
             
-            # Convert color to RGBA
-            color_rgb = self.hex_to_rgb(node.color)
-            alpha = int(255 * node.transparency)
-            color_rgba = (*color_rgb, alpha)
+            # Generous margin for the arrow, name label and deviation markers around the line
+            margin = (3 * node.thickness + node.font_size * len(node.name)
+                      + 20 * len(node.deviations) + 20 / render_scale)
+            min_x, min_y, max_x, max_y = node.points.bbox()
+            if (max_x + margin < view_x0 or min_x - margin > view_x1 or
+                    max_y + margin < view_y0 or min_y - margin > view_y1):
+                continue
+            
+            # The node being edited is drawn as canvas items by draw_native_items
+            if node == self.editing_node:
+                continue
+            
+            color_rgb, color_rgba = node.render_descriptor()
             
-            # Check if this node is selected or being edited
+            # Check if this node is selected
             is_selected = (node == self.selected_node)
-            is_editing = (node == self.editing_node)
             
             # Scale line thickness with zoom
             line_thickness = int(node.thickness * render_scale)
             if is_selected:
                 line_thickness = max(int((node.thickness + 3) * render_scale), int(node.thickness * 2 * render_scale))
             
-            # Scale points from PDF coordinates to rendered image coordinates
-            scaled_points = [(int(p[0] * render_scale), int(p[1] * render_scale)) for p in node.points]
+            # Scale points from PDF coordinates to overlay pixels in one vectorized step;
+            # frombuffer views the PointList's packed doubles without copying
+            scaled = (np.frombuffer(node.points.coords).reshape(-1, 2) * render_scale).astype(np.int32)
+            scaled -= self.page_origin
+            scaled_points = list(map(tuple, scaled.tolist()))
             
-            if is_editing:
-                # Draw dot-dashed line for nodes being edited
-                self.draw_dot_dashed_line(draw, scaled_points, color_rgba, line_thickness)
-                # Draw corner points
-                self.draw_editing_points(draw, scaled_points, color_rgb, render_scale)
-            elif is_selected:
+            if is_selected:
                 # Draw dashed line for selected nodes
                 self.draw_dashed_line(draw, scaled_points, color_rgba, line_thickness)
             else:
-                # Draw solid line for unselected nodes
-                for i in range(len(scaled_points) - 1):
-                    p1 = scaled_points[i]
-                    p2 = scaled_points[i + 1]
-                    draw.line([p1, p2], fill=color_rgba, width=line_thickness)
+                # Draw solid line for unselected nodes as one joined polyline
+                draw.line(scaled_points, fill=color_rgba, width=line_thickness, joint="curve")
             
             # Draw arrow at end
-            if node.has_arrow and len(scaled_points) >= 2:
+            if node.has_arrow:
                 self.draw_arrow(draw, scaled_points[-2], scaled_points[-1], color_rgba, line_thickness)
             
+            # Segment vectors and lengths, shared by the name and the indicators
+            geometry = self.segment_geometry(scaled) if node.name or node.deviations else None
+            
             # Draw name along longest segment (using scaled points)
             if node.name:
-                self.draw_name(draw, node, color_rgb, scaled_points, render_scale)
+                self.draw_name(draw, node, color_rgb, scaled_points, render_scale, geometry)
             
             # Draw deviation indicators (using scaled points)
             if node.deviations:
-                self.draw_deviation_indicators(draw, node, scaled_points, render_scale)
-        
-        # Draw preview line when creating a new line (preview from last point to cursor)
-        if self.creating_line and self.current_node and self.creating_preview_pos and len(self.current_node.points) >= 1:
-            ref_x, ref_y = self.current_node.points[-1]
-            preview_x, preview_y = self.creating_preview_pos
-            scaled_ref = (int(ref_x * render_scale), int(ref_y * render_scale))
-            scaled_preview = (int(preview_x * render_scale), int(preview_y * render_scale))
-            preview_color = (255, 165, 0, 200)  # Orange with transparency
-            preview_thickness = max(2, int(2 * render_scale))
-            # Draw a dashed-looking preview by drawing a semi-transparent line
-            draw.line([scaled_ref, scaled_preview], fill=preview_color, width=preview_thickness)
-            # Draw preview endpoint
-            point_size = max(5, int(5 * render_scale))
-            draw.ellipse([
-                scaled_preview[0] - point_size,
-                scaled_preview[1] - point_size,
-                scaled_preview[0] + point_size,
-                scaled_preview[1] + point_size
-            ], fill=(255, 165, 0, 255), outline=(255, 140, 0, 255), width=2)
-
-        # Draw preview line when adding a point
-        if self.adding_point and self.add_point_preview_pos and self.add_point_reference_point:
-            ref_x, ref_y = self.add_point_reference_point
-            preview_x, preview_y = self.add_point_preview_pos
-            
-            # Scale coordinates
-            scaled_ref = (int(ref_x * render_scale), int(ref_y * render_scale))
-            scaled_preview = (int(preview_x * render_scale), int(preview_y * render_scale))
-            
-            # Draw temporary preview line in a distinct color (e.g., orange/yellow)
-            preview_color = (255, 165, 0, 200)  # Orange with transparency
-            preview_thickness = max(2, int(2 * render_scale))
-            draw.line([scaled_ref, scaled_preview], fill=preview_color, width=preview_thickness)
-            
-            # Draw preview point
-            point_size = max(5, int(5 * render_scale))
-            draw.ellipse([
-                scaled_preview[0] - point_size,
-                scaled_preview[1] - point_size,
-                scaled_preview[0] + point_size,
-                scaled_preview[1] + point_size
-            ], fill=(255, 165, 0, 255), outline=(255, 140, 0, 255), width=2)
+                self.draw_deviation_indicators(draw, node, scaled_points, render_scale, geometry)
     
     def draw_arrow(self, draw, start, end, color, thickness):
         """Draw an arrow at the end of a line."""
@@ -328,64 +595,79 @@ class PDFViewer(tk.Canvas):
         draw.line([end, arrow1], fill=color, width=thickness)
         draw.line([end, arrow2], fill=color, width=thickness)
     
-    def draw_name(self, draw, node, color_rgb, scaled_points=None, render_scale=None):
+    def segment_geometry(self, points):
+        """Return the points as a float array with their segment vectors and lengths."""
+        pts = np.asarray(points, dtype=np.float64)
+        seg = np.diff(pts, axis=0)
+        return pts, seg, np.hypot(seg[:, 0], seg[:, 1])
+    
+    def label_placement(self, geometry):
+        """Return the centre of the longest segment and its angle in degrees, where the name goes."""
+        pts, seg, segment_lengths = geometry
+        i = int(np.argmax(segment_lengths))
+        mid_x, mid_y = ((pts[i] + pts[i + 1]) / 2).tolist()
+        return mid_x, mid_y, math.degrees(math.atan2(seg[i][1], seg[i][0]))
+    
+    def marker_centers(self, geometry, count, radius):
+        """Return the centres of count deviation markers spread around the middle of the line."""
+        pts, seg, segment_lengths = geometry
+        cumulative = np.cumsum(segment_lengths)
+        total_length = cumulative[-1]
+        
+        if total_length == 0:
+            return []
+        
+        # The center lies on the first segment whose end reaches half the length
+        target_length = total_length / 2
+        i = int(np.searchsorted(cumulative, target_length))
+        seg_len = segment_lengths[i]
+        t = (target_length - (cumulative[i] - seg_len)) / seg_len
+        center_x, center_y = (pts[i] + t * seg[i]).tolist()
+        
+        # Line direction at center for arranging circles
+        line_dx, line_dy = (seg[i] / seg_len).tolist()
+        
+        # Calculate perpendicular direction for offset
+        perp_dx = -line_dy
+        perp_dy = line_dx
+        
+        spacing = radius * 2.5  # Spacing between circles
+        
+        # Calculate starting position (centered)
+        total_spread = (count - 1) * spacing if count > 1 else 0
+        start_offset = -total_spread / 2
+        
+        centers = []
+        for i in range(count):
+            # Position along the line
+            offset = start_offset + i * spacing
+            # Offset perpendicular to line
+            centers.append((center_x + offset * line_dx + perp_dx * (radius + 2),
+                            center_y + offset * line_dy + perp_dy * (radius + 2)))
+        return centers
+    
+    def draw_name(self, draw, node, color_rgb, scaled_points=None, render_scale=None, geometry=None):
         """Draw node name along the longest segment."""
         if scaled_points is None:
             scaled_points = node.points
         if len(scaled_points) < 2:
             return
         
-        # Find longest segment
-        max_length = 0
-        longest_start = scaled_points[0]
-        longest_end = scaled_points[1]
-        
-        for i in range(len(scaled_points) - 1):
-            p1 = scaled_points[i]
-            p2 = scaled_points[i + 1]
-            length = math.sqrt((p2[0]-p1[0])**2 + (p2[1]-p1[1])**2)
-            if length > max_length:
-                max_length = length
-                longest_start = p1
-                longest_end = p2
-        
-        # Calculate position and angle
-        mid_x = (longest_start[0] + longest_end[0]) / 2
-        mid_y = (longest_start[1] + longest_end[1]) / 2
-        
-        dx = longest_end[0] - longest_start[0]
-        dy = longest_end[1] - longest_start[1]
-        angle = math.degrees(math.atan2(dy, dx))
+        # Position and angle of the longest segment
+        mid_x, mid_y, angle = self.label_placement(geometry or self.segment_geometry(scaled_points))
         
         # Scale font size with zoom
         scaled_font_size = int(node.font_size * render_scale) if render_scale else node.font_size
         
-        # Try to get font
-        try:
-            font = ImageFont.truetype("arial.ttf", scaled_font_size)
-        except:
-            font = ImageFont.load_default()
-        
-        # Draw text with background for visibility
-        bbox = draw.textbbox((0, 0), node.name, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        # Create text image
-        text_img = Image.new("RGBA", (text_width + 4, text_height + 4), (255, 255, 255, 200))
-        text_draw = ImageDraw.Draw(text_img)
-        text_draw.text((2, 2), node.name, fill=(*color_rgb, 255), font=font)
-        
-        # Rotate if needed
-        if abs(angle) > 45 and abs(angle) < 135:
-            text_img = text_img.rotate(90, expand=True)
+        # Draw text with background for visibility, rotated along steep segments
+        text_img = render_label(node.name, scaled_font_size, color_rgb, 45 < abs(angle) < 135)
         
         # Paste onto overlay
         paste_x = int(mid_x - text_img.width / 2)
         paste_y = int(mid_y - text_img.height / 2)
         self.overlay_image.paste(text_img, (paste_x, paste_y), text_img)
     
-    def draw_deviation_indicators(self, draw, node, scaled_points=None, render_scale=None):
+    def draw_deviation_indicators(self, draw, node, scaled_points=None, render_scale=None, geometry=None):
         """Draw indicators for deviations on a node."""
         if not node.deviations:
             return
@@ -398,101 +680,22 @@ class PDFViewer(tk.Canvas):
         if len(scaled_points) < 2:
             return
         
-        # Find the center segment of the line
-        total_length = 0
-        segment_lengths = []
-        for i in range(len(scaled_points) - 1):
-            p1 = scaled_points[i]
-            p2 = scaled_points[i + 1]
-            seg_len = math.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
-            segment_lengths.append(seg_len)
-            total_length += seg_len
-        
-        if total_length == 0:
-            return
-        
-        # Find the center point along the line
-        target_length = total_length / 2
-        current_length = 0
-        center_x, center_y = scaled_points[0]
-        
-        for i in range(len(scaled_points) - 1):
-            seg_len = segment_lengths[i]
-            if current_length + seg_len >= target_length:
-                # Center is on this segment
-                p1 = scaled_points[i]
-                p2 = scaled_points[i + 1]
-                t = (target_length - current_length) / seg_len
-                center_x = p1[0] + t * (p2[0] - p1[0])
-                center_y = p1[1] + t * (p2[1] - p1[1])
-                break
-            current_length += seg_len
-        
-        # Get line direction at center for arranging circles
-        # Find the segment containing the center
-        current_length = 0
-        line_dx, line_dy = 0, 0
-        for i in range(len(scaled_points) - 1):
-            seg_len = segment_lengths[i]
-            if current_length + seg_len >= target_length:
-                p1 = scaled_points[i]
-                p2 = scaled_points[i + 1]
-                line_dx = p2[0] - p1[0]
-                line_dy = p2[1] - p1[1]
-                line_len = math.sqrt(line_dx**2 + line_dy**2)
-                if line_len > 0:
-                    line_dx /= line_len
-                    line_dy /= line_len
-                break
-            current_length += seg_len
-        
-        # If we couldn't determine direction, use first segment
-        if line_dx == 0 and line_dy == 0 and len(scaled_points) >= 2:
-            p1 = scaled_points[0]
-            p2 = scaled_points[1]
-            line_dx = p2[0] - p1[0]
-            line_dy = p2[1] - p1[1]
-            line_len = math.sqrt(line_dx**2 + line_dy**2)
-            if line_len > 0:
-                line_dx /= line_len
-                line_dy /= line_len
-        
-        # Calculate perpendicular direction for offset
-        perp_dx = -line_dy
-        perp_dy = line_dx
-        
         # Get node color
-        color_rgb = self.hex_to_rgb(node.color)
+        color_rgb, _ = node.render_descriptor()
         circle_color = (*color_rgb, 255)
         outline_color = (255, 255, 255, 255)  # White outline
         
         # Scale radius and spacing with zoom
         base_radius = 8
         radius = int(base_radius * render_scale) if render_scale else base_radius
-        spacing = radius * 2.5  # Spacing between circles
         
-        # Calculate starting position (centered)
-        total_spread = (count - 1) * spacing if count > 1 else 0
-        start_offset = -total_spread / 2
-        
-        for i in range(count):
-            # Position along the line
-            offset = start_offset + i * spacing
-            
-            # Calculate circle center
-            circle_x = center_x + offset * line_dx + perp_dx * (radius + 2)  # Offset perpendicular to line
-            circle_y = center_y + offset * line_dy + perp_dy * (radius + 2)
-            
+        geometry = geometry or self.segment_geometry(scaled_points)
+        for circle_x, circle_y in self.marker_centers(geometry, count, radius):
             # Draw circle with node color
             draw.ellipse([circle_x - radius, circle_y - radius, 
                          circle_x + radius, circle_y + radius], 
                         fill=circle_color, outline=outline_color, width=2)
     
-    def hex_to_rgb(self, hex_color):
-        """Convert hex color to RGB tuple."""
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    
     def screen_to_pdf_coords(self, x, y):
         """Convert screen coordinates to PDF coordinates."""
         if not self.photo:
@@ -504,17 +707,17 @@ class PDFViewer(tk.Canvas):
         # But scale * base_zoom * zoom_level = display_width / pdf_width
         # So: pdf_coord = (screen_coord - pan) * pdf_width / display_width
         # Or: pdf_coord = (screen_coord - pan) / scale / base_zoom / zoom_level
-        effective_scale = self.scale * self.base_zoom * self.zoom_level
-        pdf_x = (x - self.pan_x) / effective_scale
-        pdf_y = (y - self.pan_y) / effective_scale
+        inverse_scale = 1.0 / self.effective_scale
+        pdf_x = (x - self.pan_x) * inverse_scale
+        pdf_y = (y - self.pan_y) * inverse_scale
         return int(pdf_x), int(pdf_y)
     
     def pdf_to_screen_coords(self, x, y):
         """Convert PDF coordinates to screen coordinates."""
         # screen_coord = pdf_coord * scale * base_zoom * zoom_level + pan
-        effective_scale = self.scale * self.base_zoom * self.zoom_level
-        screen_x = x * effective_scale + self.pan_x
-        screen_y = y * effective_scale + self.pan_y
+        render_scale = self.effective_scale
+        screen_x = x * render_scale + self.pan_x
+        screen_y = y * render_scale + self.pan_y
         return int(screen_x), int(screen_y)
     
     def on_click(self, event):
@@ -525,7 +728,6 @@ class PDFViewer(tk.Canvas):
         if self.creating_line:
             # Add point to current line
             pdf_x, pdf_y = self.screen_to_pdf_coords(event.x, event.y)
-            self.current_line_points.append((pdf_x, pdf_y))
             
             if not self.current_node:
                 # Create new node
@@ -594,9 +796,9 @@ class PDFViewer(tk.Canvas):
             dy = event.y - self.drag_start_y
             
             # Convert screen movement to PDF coordinates
-            effective_scale = self.scale * self.base_zoom * self.zoom_level
-            pdf_dx = dx / effective_scale
-            pdf_dy = dy / effective_scale
+            inverse_scale = 1.0 / self.effective_scale
+            pdf_dx = dx * inverse_scale
+            pdf_dy = dy * inverse_scale
             
             # Get original point
             orig_x, orig_y = self.drag_original_point
@@ -613,73 +815,165 @@ class PDFViewer(tk.Canvas):
             self.drag_start_y = event.y
             self.drag_original_point = (new_x, new_y)
             
-            # Throttle rendering to avoid lag - only render every N drag events
-            if not hasattr(self, '_drag_render_count'):
-                self._drag_render_count = 0
-            self._drag_render_count += 1
-            
-            # Render every 3rd drag event for smoother performance
-            if self._drag_render_count % 3 == 0:
-                self.render_page()
-            else:
-                # Quick update: just redraw the canvas without full PDF re-render
-                self.quick_redraw()
+            # Only the canvas items move; the overlay is redrawn on release
+            self.draw_native_items()
     
     def on_release(self, event):
         """Handle mouse release."""
         if self.dragging_point is not None:
             self.dragging_point = None
             # Final render to ensure everything is up to date
-            if hasattr(self, '_drag_render_count'):
-                self._drag_render_count = 0
             self.render_page()
     
-    def quick_redraw(self):
+    def quick_redraw(self, dirty=True):
         """Quick redraw of overlays without full PDF re-render."""
-        if not self.doc or not self.overlay_image or not self.page_image:
+        if not self.pdf_path or not self.photo or not self.page_image:
             return
         
-        # Recreate overlay with updated points
-        self.overlay_image = Image.new("RGBA", self.page_image.size, (0, 0, 0, 0))
-        self.draw_overlays()
-        
-        # Combine images
-        combined = Image.alpha_composite(self.page_image, self.overlay_image)
+        if dirty:
+            self.overlay_key = None
+        # Everything draw_overlays reads besides the node data itself
+        key = (self.current_page, self.display_size, self.page_origin, self.scale, self.zoom_level,
+               self.selected_node, self.editing_node,
+               self.creating_line, self.current_node)
+        if key != self.overlay_key:
+            self.overlay_key = key
+            
+            # Redraw the overlay directly at display size, clearing the previous
+            # buffer and Tk image in place while the size stays the same
+            reuse = self.overlay_image is not None and self.overlay_image.size == self.display_size
+            old_bbox = self.overlay_bbox if reuse else None
+            if old_bbox:
+                self.overlay_image.paste((0, 0, 0, 0), old_bbox)
+            elif not reuse:
+                self.overlay_image = Image.new("RGBA", self.display_size, (0, 0, 0, 0))
+                self.overlay_draw = ImageDraw.Draw(self.overlay_image)
+            self.draw_overlays()
+            self.overlay_bbox = self.overlay_image.getbbox()
+            
+            if reuse and self.overlay_photo is not None:
+                # Only the area drawn before or now can differ, so upload just that
+                boxes = [box for box in (old_bbox, self.overlay_bbox) if box]
+                if boxes:
+                    self.paste_region(self.overlay_photo, self.overlay_image,
+                                      (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                                       max(b[2] for b in boxes), max(b[3] for b in boxes)))
+            else:
+                # Keep a reference so Tk's image is not garbage collected
+                self.overlay_photo = ImageTk.PhotoImage(self.overlay_image)
+                self.show_layer("overlay", self.overlay_photo)
         
-        # Calculate display size (same as in render_page)
-        canvas_width = self.winfo_width()
-        canvas_height = self.winfo_height()
+        # Apply pan offset
+        origin_x, origin_y = self.page_origin
+        self.coords("page", self.pan_x + origin_x, self.pan_y + origin_y)
+        self.coords("overlay", self.pan_x + origin_x, self.pan_y + origin_y)
+        self.draw_native_items()
+    
+    def paste_region(self, photo, image, box):
+        """Copy one region of a PIL image into a Tk photo, leaving the rest of the photo as is."""
+        patch = ImageTk.PhotoImage(image.crop(box))
+        # "set" replaces pixels, so areas that became transparent are cleared too
+        self.tk.call(str(photo), "copy", str(patch), "-to", box[0], box[1], "-compositingrule", "set")
+    
+    def draw_native_items(self):
+        """Draw the node being edited, its handles and the previews as canvas items.
         
-        if canvas_width > 1 and canvas_height > 1:
-            if self.fit_to_window and self.zoom_level == 1.0:
-                img_ratio = combined.width / combined.height
-                canvas_ratio = canvas_width / canvas_height
-                
-                if img_ratio > canvas_ratio:
-                    display_width = canvas_width
-                    display_height = int(canvas_width / img_ratio)
-                else:
-                    display_height = canvas_height
-                    display_width = int(canvas_height * img_ratio)
-                
-                combined = combined.resize((display_width, display_height), Image.Resampling.LANCZOS)
+        These follow the mouse, so they are moved with coords instead of being
+        rasterized into the overlay image.
+        """
+        render_scale = self.effective_scale
+        pan = (self.pan_x, self.pan_y)
+        
+        node = self.editing_node
+        if node is not None and node.page_number == self.current_page and len(node.points) >= 2:
+            color_rgb, _ = node.render_descriptor()
+            color = "#%02x%02x%02x" % color_rgb
+            scaled = (np.frombuffer(node.points.coords).reshape(-1, 2) * render_scale).astype(np.int32) + pan
+            
+            line_thickness = max(1, int((node.thickness + 3) * render_scale), int(node.thickness * 2 * render_scale))
+            arrow_size = max(10, line_thickness * 3)
+            line_options = dict(fill=color, width=line_thickness,
+                                arrow=tk.LAST if node.has_arrow else tk.NONE,
+                                arrowshape=(arrow_size, arrow_size, arrow_size // 2))
+            if self.find_withtag("edit_line"):
+                self.coords("edit_line", *scaled.ravel().tolist())
+                self.itemconfig("edit_line", **line_options)
+            else:
+                # Dot-dashed to tell the edited line apart from a selected one
+                self.create_line(*scaled.ravel().tolist(), dash=(3, 4, 8, 4), capstyle=tk.ROUND,
+                                 joinstyle=tk.ROUND, tags=("edit_line", "native"), **line_options)
+            
+            # One square handle per corner point
+            half_size = max(8, int(8 * render_scale)) // 2
+            # Adding or removing a point creates or deletes just the handles that differ
+            handles = list(self.find_withtag("edit_point"))
+            for handle in handles[len(scaled):]:
+                self.delete(handle)
+            handles[len(scaled):] = [self.create_rectangle(0, 0, 0, 0, outline="white", width=2,
+                                                           tags=("edit_point", "native"))
+                                     for _ in range(len(scaled) - len(handles))]
+            for handle, (x, y) in zip(handles, scaled.tolist()):
+                self.coords(handle, x - half_size, y - half_size, x + half_size, y + half_size)
+            self.itemconfig("edit_point", fill=color)
+            
+            # The name and deviation markers follow a dragged point too
+            geometry = self.segment_geometry(scaled)
+            if node.name:
+                x, y, angle = self.label_placement(geometry)
+                if not self.find_withtag("edit_name"):
+                    self.create_rectangle(0, 0, 0, 0, fill="white", outline="", tags=("edit_name_box", "native"))
+                    self.create_text(0, 0, tags=("edit_name", "native"))
+                self.coords("edit_name", x, y)
+                # Negative Tk font sizes are in pixels, like the overlay's
+                self.itemconfig("edit_name", text=node.name, fill=color,
+                                font=("Arial", -max(1, int(node.font_size * render_scale))),
+                                angle=90 if 45 < abs(angle) < 135 else 0)
+                x0, y0, x1, y1 = self.bbox("edit_name")
+                self.coords("edit_name_box", x0, y0, x1, y1)
             else:
-                display_width = combined.width
-                display_height = combined.height
+                self.delete("edit_name", "edit_name_box")
+            
+            radius = int(8 * render_scale)
+            centers = self.marker_centers(geometry, len(node.deviations), radius) if node.deviations else []
+            markers = list(self.find_withtag("edit_marker"))
+            for marker in markers[len(centers):]:
+                self.delete(marker)
+            markers[len(centers):] = [self.create_oval(0, 0, 0, 0, outline="white", width=2,
+                                                       tags=("edit_marker", "native"))
+                                      for _ in range(len(centers) - len(markers))]
+            for marker, (x, y) in zip(markers, centers):
+                self.coords(marker, x - radius, y - radius, x + radius, y + radius)
+            self.itemconfig("edit_marker", fill=color)
         else:
-            return
+            self.delete("edit_line", "edit_point", "edit_name", "edit_name_box", "edit_marker")
         
-        # Convert to PhotoImage
-        self.photo = ImageTk.PhotoImage(combined)
+        # Preview from the last clicked point (or the add-point reference) to the cursor
+        preview = None
+        if self.creating_line and self.current_node and self.creating_preview_pos and len(self.current_node.points) >= 1:
+            preview = (self.current_node.points[-1], self.creating_preview_pos)
+        elif self.adding_point and self.add_point_preview_pos and self.add_point_reference_point:
+            preview = (self.add_point_reference_point, self.add_point_preview_pos)
         
-        # Update canvas
-        self.delete("all")
-        x_pos = self.pan_x
-        y_pos = self.pan_y
-        self.create_image(x_pos, y_pos, anchor=tk.NW, image=self.photo)
+        if preview:
+            ref_x, ref_y = self.pdf_to_screen_coords(*preview[0])
+            preview_x, preview_y = self.pdf_to_screen_coords(*preview[1])
+            point_size = max(5, int(5 * render_scale))
+            if self.find_withtag("preview_line"):
+                self.coords("preview_line", ref_x, ref_y, preview_x, preview_y)
+            else:
+                self.create_line(ref_x, ref_y, preview_x, preview_y, fill="#ffa500",
+                                 width=max(2, int(2 * render_scale)), tags=("preview_line", "native"))
+                self.create_oval(0, 0, 0, 0, fill="#ffa500", outline="#ff8c00", width=2,
+                                 tags=("preview_point", "native"))
+            self.itemconfig("preview_line", width=max(2, int(2 * render_scale)))
+            self.coords("preview_point", preview_x - point_size, preview_y - point_size,
+                        preview_x + point_size, preview_y + point_size)
+        else:
+            self.delete("preview_line", "preview_point")
         
-        # Store image reference
-        self.image_ref = self.photo
+        # Keep the items above the page and overlay images, stacked as the overlay draws them
+        for tag in ("native", "edit_name_box", "edit_name", "edit_marker", "edit_point"):
+            self.tag_raise(tag)
     
     def on_right_click(self, event):
         """Handle right mouse click."""
@@ -710,7 +1004,7 @@ class PDFViewer(tk.Canvas):
             # Update preview position for line creation (last point -> cursor)
             pdf_x, pdf_y = self.screen_to_pdf_coords(event.x, event.y)
             self.creating_preview_pos = (pdf_x, pdf_y)
-            self.quick_redraw()
+            self.draw_native_items()
         elif self.adding_point:
             # Update preview position with constraint
             pdf_x, pdf_y = self.screen_to_pdf_coords(event.x, event.y)
@@ -746,14 +1040,21 @@ class PDFViewer(tk.Canvas):
     
     def on_configure(self, event):
         """Handle canvas resize."""
-        if self.doc and event.width > 1 and event.height > 1:
-            # Re-render on resize (with debouncing to avoid too many renders)
+        if self.pdf_path and event.width > 1 and event.height > 1:
+            # Re-render on resize, once the size settles rather than per event
             if self.fit_to_window and self.zoom_level == 1.0:
-                self.after(100, self.render_page)
+                if self._configure_after:
+                    self.after_cancel(self._configure_after)
+                self._configure_after = self.after(150, self._do_configure_render)
+    
+    def _do_configure_render(self):
+        """Run the re-render scheduled by on_configure."""
+        self._configure_after = None
+        self.render_page(dirty=False)
     
     def on_mouse_wheel(self, event):
         """Handle mouse wheel for zooming."""
-        if not self.doc:
+        if not self.pdf_path:
             return
         
         # Check if Ctrl is held for zoom, otherwise allow normal scrolling
@@ -768,39 +1069,24 @@ class PDFViewer(tk.Canvas):
             else:
                 return
             
-            # Get mouse position
-            mouse_x = event.x
-            mouse_y = event.y
-            
-            # Convert to PDF coordinates before zoom
-            pdf_x, pdf_y = self.screen_to_pdf_coords(mouse_x, mouse_y)
-            
-            # Zoom
-            old_zoom = self.zoom_level
             zoom_factor = 1.1 if delta > 0 else 1/1.1
-            new_zoom = old_zoom * zoom_factor
-            new_zoom = max(0.1, min(5.0, new_zoom))  # Limit zoom between 10% and 500%
-            
-            if new_zoom != old_zoom:
-                # Calculate effective scale before zoom change
-                old_effective_scale = self.scale * self.base_zoom * old_zoom
-                
-                self.zoom_level = new_zoom
-                self.fit_to_window = False
-                
-                # Calculate new effective scale (scale will be updated in render, but we approximate)
-                # The scale changes proportionally with zoom in zoomed mode
-                zoom_ratio = new_zoom / old_zoom if old_zoom > 0 else 1.0
-                new_effective_scale = old_effective_scale * zoom_ratio
-                
-                # Adjust pan to keep the point under mouse in the same place
-                new_screen_x = pdf_x * new_effective_scale + self.pan_x
-                new_screen_y = pdf_y * new_effective_scale + self.pan_y
-                
-                self.pan_x += mouse_x - new_screen_x
-                self.pan_y += mouse_y - new_screen_y
-                
-                self.render_page()
+            if self.zoom_at(self.zoom_level * zoom_factor, event.x, event.y):
+                self.schedule_zoom_render()
+    
+    def schedule_zoom_render(self):
+        """Render the new zoom on the next frame.
+        
+        A fast wheel spin or a held Ctrl-+ sends many steps; the state changes
+        with each, but only one render per frame runs for all of them.
+        """
+        if not self._zoom_render_pending:
+            self._zoom_render_pending = True
+            self.after(16, self._do_zoom_render)
+    
+    def _do_zoom_render(self):
+        """Run the render queued by schedule_zoom_render."""
+        self._zoom_render_pending = False
+        self.render_page(dirty=False)
     
     def on_middle_click(self, event):
         """Start panning with middle mouse button."""
@@ -818,15 +1104,40 @@ class PDFViewer(tk.Canvas):
             self.pan_y += dy
             self.pan_start_x = event.x
             self.pan_start_y = event.y
-            self.render_page()
+            # Slide what is already drawn; render_page catches up on release
+            self.move(tk.ALL, dx, dy)
     
     def on_middle_release(self, event):
         """Stop panning."""
-        self.panning = False
+        if self.panning:
+            self.panning = False
+            # A zoomed page may need a new clip rendered for the area now in view
+            self.render_page(dirty=False)
+    
+    def zoom_at(self, new_zoom, x, y):
+        """Change the zoom level keeping the page point under screen point (x, y) in place.
+        
+        The zoom is limited to 10%-500%; returns False if that leaves it unchanged.
+        """
+        # Rounded so repeated steps cannot drift, and so a step into the limit that
+        # only differs by float noise counts as no change
+        new_zoom = round(max(0.1, min(5.0, new_zoom)), 4)
+        if new_zoom == self.zoom_level:
+            return False
+        
+        # screen = pdf * effective_scale + pan, and effective_scale grows by k, so
+        # keeping pdf fixed at (x, y) gives pan' = x - k * (x - pan). scale is only
+        # updated in render, so it is taken as unchanged here.
+        k = new_zoom / self.zoom_level
+        self.zoom_level = new_zoom
+        self.fit_to_window = False
+        self.pan_x = x - k * (x - self.pan_x)
+        self.pan_y = y - k * (y - self.pan_y)
+        return True
     
     def zoom_in(self, factor=1.2, mouse_x=None, mouse_y=None):
         """Zoom in around mouse cursor position."""
-        if not self.doc:
+        if not self.pdf_path:
             return
         
         # Get mouse position - use current cursor position if not provided
@@ -840,38 +1151,12 @@ class PDFViewer(tk.Canvas):
                 mouse_x = self.winfo_width() / 2
                 mouse_y = self.winfo_height() / 2
         
-        # Convert to PDF coordinates before zoom
-        pdf_x, pdf_y = self.screen_to_pdf_coords(mouse_x, mouse_y)
-        
-        # Zoom
-        old_zoom = self.zoom_level
-        new_zoom = old_zoom * factor
-        new_zoom = max(0.1, min(5.0, new_zoom))
-        
-        if new_zoom != old_zoom:
-            # Calculate effective scale before zoom change
-            old_effective_scale = self.scale * self.base_zoom * old_zoom
-            
-            self.zoom_level = new_zoom
-            self.fit_to_window = False
-            
-            # Calculate new effective scale (scale will be updated in render, but we approximate)
-            # The scale changes proportionally with zoom in zoomed mode
-            zoom_ratio = new_zoom / old_zoom if old_zoom > 0 else 1.0
-            new_effective_scale = old_effective_scale * zoom_ratio
-            
-            # Adjust pan to keep the point under mouse in the same place
-            new_screen_x = pdf_x * new_effective_scale + self.pan_x
-            new_screen_y = pdf_y * new_effective_scale + self.pan_y
-            
-            self.pan_x += mouse_x - new_screen_x
-            self.pan_y += mouse_y - new_screen_y
-            
-            self.render_page()
+        if self.zoom_at(self.zoom_level * factor, mouse_x, mouse_y):
+            self.schedule_zoom_render()
     
     def zoom_out(self, factor=1.2, mouse_x=None, mouse_y=None):
         """Zoom out around mouse cursor position."""
-        if not self.doc:
+        if not self.pdf_path:
             return
         
         # Get mouse position - use current cursor position if not provided
@@ -885,41 +1170,22 @@ class PDFViewer(tk.Canvas):
                 mouse_x = self.winfo_width() / 2
                 mouse_y = self.winfo_height() / 2
         
-        # Convert to PDF coordinates before zoom
-        pdf_x, pdf_y = self.screen_to_pdf_coords(mouse_x, mouse_y)
-        
-        # Zoom
-        new_zoom = self.zoom_level / factor
-        new_zoom = max(0.1, min(5.0, new_zoom))
-        
-        if new_zoom != self.zoom_level:
-            self.zoom_level = new_zoom
-            self.fit_to_window = False
-            
-            # Adjust pan to keep the point under mouse in the same place
-            effective_scale = self.scale * self.base_zoom * self.zoom_level
-            new_screen_x = pdf_x * effective_scale + self.pan_x
-            new_screen_y = pdf_y * effective_scale + self.pan_y
-            
-            self.pan_x += mouse_x - new_screen_x
-            self.pan_y += mouse_y - new_screen_y
-            
-            self.render_page()
+        if self.zoom_at(self.zoom_level / factor, mouse_x, mouse_y):
+            self.schedule_zoom_render()
     
     def reset_zoom(self):
         """Reset zoom to fit window."""
-        if not self.doc:
+        if not self.pdf_path:
             return
         self.zoom_level = 1.0
         self.fit_to_window = True
         self.pan_x = 0
         self.pan_y = 0
-        self.render_page()
+        self.render_page(dirty=False)
     
     def start_line_creation(self):
         """Start creating a new line."""
         self.creating_line = True
-        self.current_line_points = []
         self.current_node = None
         self.creating_preview_pos = None
         if self.parent:
@@ -932,7 +1198,6 @@ class PDFViewer(tk.Canvas):
             self.hazop_data.remove_node(self.current_node)
         
         self.creating_line = False
-        self.current_line_points = []
         self.current_node = None
         self.creating_preview_pos = None
         if self.parent:
@@ -941,183 +1206,147 @@ class PDFViewer(tk.Canvas):
     
     def find_node_at_point(self, x, y, tolerance=20):
         """Find node near a point by checking distance to line segments."""
-        nodes = self.hazop_data.get_nodes_for_page(self.current_page)
         tolerance_pdf = tolerance / self.scale if self.scale > 0 else tolerance
+        nodes = self.candidate_nodes(x, y, tolerance_pdf)
         
         closest_node = None
-        closest_distance = float('inf')
+        closest_distance = float('inf')  # Squared, as are all distances compared below
         
         for node in nodes:
             if len(node.points) < 2:
                 continue
             
-            # Check distance to each line segment
-            for i in range(len(node.points) - 1):
-                p1 = node.points[i]
-                p2 = node.points[i + 1]
-                
-                # Calculate distance from point to line segment
-                dist = self.point_to_line_distance((x, y), p1, p2)
-                
-                if dist < closest_distance:
-                    closest_distance = dist
-                    closest_node = node
+            # Skip lines whose bounding box is already further away than the tolerance
+            min_x, min_y, max_x, max_y = node.points.bbox()
+            if (x < min_x - tolerance_pdf or x > max_x + tolerance_pdf or
+                    y < min_y - tolerance_pdf or y > max_y + tolerance_pdf):
+                continue
             
-            # Also check distance to endpoints (for easier selection)
-            for point in node.points:
-                dist = math.sqrt((point[0] - x)**2 + (point[1] - y)**2)
-                if dist < closest_distance:
-                    closest_distance = dist
-                    closest_node = node
+            # Nearest segment of this node; endpoints lie on segments so need no separate check
+            dist_sq, _ = self.nearest_segment(node, x, y, tolerance_pdf)
+            if dist_sq < closest_distance:
+                closest_distance = dist_sq
+                closest_node = node
         
         # Return node if within tolerance
-        if closest_node and closest_distance <= tolerance_pdf:
+        if closest_node and closest_distance <= tolerance_pdf * tolerance_pdf:
             return closest_node
         
         return None
     
-    def point_to_line_distance(self, point, line_start, line_end):
-        """Calculate distance from a point to a line segment."""
-        px, py = point
-        x1, y1 = line_start
-        x2, y2 = line_end
-        
-        # Vector from line_start to line_end
-        dx = x2 - x1
-        dy = y2 - y1
+    def candidate_nodes(self, x, y, tolerance_pdf):
+        """Return the nodes on the current page whose bounding box is within tolerance of a point.
         
-        # If line segment is actually a point
-        if dx == 0 and dy == 0:
-            return math.sqrt((px - x1)**2 + (py - y1)**2)
-        
-        # Calculate t (parameter along line segment)
-        t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)))
+        With rtree installed and enough nodes on the page this is an index query;
+        otherwise all nodes are returned for find_node_at_point to filter.
+        """
+        nodes = self.hazop_data.get_nodes_for_page(self.current_page)
+        if rtree_index is None or len(nodes) < 32:
+            return nodes
+        
+        # Rebuilt only when nodes were added or removed or points on this page changed
+        key = (id(self.hazop_data), self.current_page, self.hazop_data.node_version,
+               tuple(node.points.version for node in nodes))
+        if key != self._node_index_key:
+            indexed = [node for node in nodes if len(node.points) >= 2]
+            # Bulk loading refuses an empty stream
+            index = (rtree_index.Index((i, node.points.bbox(), None) for i, node in enumerate(indexed))
+                     if indexed else None)
+            self._node_index = (index, indexed)
+            self._node_index_key = key
+        
+        index, indexed = self._node_index
+        if index is None:
+            return []
+        hits = index.intersection((x - tolerance_pdf, y - tolerance_pdf, x + tolerance_pdf, y + tolerance_pdf))
+        # Page order, so ties resolve to the same node as a full scan
+        return [indexed[i] for i in sorted(hits)]
+    
+    def squared_segment_distances(self, node, x, y, indices=None):
+        """Return the squared distance from a PDF point to each segment of a node's line, as an array.
         
-        # Closest point on line segment
-        closest_x = x1 + t * dx
-        closest_y = y1 + t * dy
+        Squared distances order the same way as distances, so callers compare them
+        against a squared tolerance and never need the square root. indices limits
+        the result to those segments.
+        """
+        start, delta, length, _ = node.points.segments()
+        if indices is not None:
+            start, delta, length = start[indices], delta[indices], length[indices]
+        offset = np.array((x, y), dtype=np.float64) - start
+        
+        # Parameter of the closest point along each segment; zero-length segments give 0/0
+        with np.errstate(invalid='ignore'):
+            t = (offset * delta).sum(axis=1) / (length * length)
+        t = np.clip(np.nan_to_num(t), 0, 1)
+        
+        offset -= t[:, None] * delta
+        return (offset * offset).sum(axis=1)
+    
+    def nearest_segment(self, node, x, y, tolerance=None):
+        """Return (squared distance, index) of the segment of a node's line nearest a PDF point.
         
-        # Distance from point to closest point on line
-        return math.sqrt((px - closest_x)**2 + (py - closest_y)**2)
+        With a tolerance, segments further away than that may be left out, and
+        (inf, -1) is returned when none is within it.
+        """
+        if scan_polyline is not None:
+            # A compiled loop beats NumPy's per-call overhead on lines of a few points
+            return scan_polyline(float(x), float(y), np.frombuffer(node.points.coords))
+        
+        if tolerance is not None and len(node.points) > 16:
+            # On long lines, measure only segments whose bounding circle reaches the tolerance
+            _, _, length, mid = node.points.segments()
+            offset = mid - (x, y)
+            reach = length / 2 + tolerance
+            candidates = np.flatnonzero((offset * offset).sum(axis=1) <= reach * reach)
+            if not len(candidates):
+                return float('inf'), -1
+            distances_sq = self.squared_segment_distances(node, x, y, candidates)
+            index = int(np.argmin(distances_sq))
+            return distances_sq[index], int(candidates[index])
+        
+        distances_sq = self.squared_segment_distances(node, x, y)
+        index = int(np.argmin(distances_sq))
+        return distances_sq[index], index
     
     def draw_dashed_line(self, draw, points, color, width, dash_length=10, gap_length=5):
         """Draw a dashed line through multiple points."""
-        for i in range(len(points) - 1):
-            p1 = points[i]
-            p2 = points[i + 1]
-            
-            # Calculate line length and direction
-            dx = p2[0] - p1[0]
-            dy = p2[1] - p1[1]
-            length = math.sqrt(dx*dx + dy*dy)
-            
-            if length == 0:
-                continue
-            
-            # Normalize direction
-            dx /= length
-            dy /= length
-            
-            # Draw dashed segments
-            current_length = 0
-            draw_dash = True
-            
-            while current_length < length:
-                if draw_dash:
-                    # Start of dash
-                    start_x = p1[0] + current_length * dx
-                    start_y = p1[1] + current_length * dy
-                    
-                    # End of dash (or end of line)
-                    dash_end = min(current_length + dash_length, length)
-                    end_x = p1[0] + dash_end * dx
-                    end_y = p1[1] + dash_end * dy
-                    
-                    draw.line([(start_x, start_y), (end_x, end_y)], fill=color, width=width)
-                
-                # Move to next segment
-                segment_length = dash_length if draw_dash else gap_length
-                current_length += segment_length
-                draw_dash = not draw_dash
-    
-    def draw_dot_dashed_line(self, draw, points, color, width, dot_length=3, dash_length=8, gap_length=4):
-        """Draw a dot-dashed line through multiple points."""
-        for i in range(len(points) - 1):
-            p1 = points[i]
-            p2 = points[i + 1]
-            
-            # Calculate line length and direction
-            dx = p2[0] - p1[0]
-            dy = p2[1] - p1[1]
-            length = math.sqrt(dx*dx + dy*dy)
-            
-            if length == 0:
-                continue
-            
-            # Normalize direction
-            dx /= length
-            dy /= length
-            
-            # Draw dot-dashed segments: dot, gap, dash, gap, dot, gap, dash, gap...
-            current_length = 0
-            segment_type = 0  # 0=dot, 1=gap, 2=dash, 3=gap
-            
-            while current_length < length:
-                if segment_type == 0:  # Dot
-                    # Draw a small dot
-                    dot_x = p1[0] + current_length * dx
-                    dot_y = p1[1] + current_length * dy
-                    dot_radius = max(2, width // 2)
-                    draw.ellipse([dot_x - dot_radius, dot_y - dot_radius,
-                                dot_x + dot_radius, dot_y + dot_radius],
-                               fill=color)
-                    current_length += dot_length
-                    segment_type = 1
-                elif segment_type == 1:  # Gap after dot
-                    current_length += gap_length
-                    segment_type = 2
-                elif segment_type == 2:  # Dash
-                    start_x = p1[0] + current_length * dx
-                    start_y = p1[1] + current_length * dy
-                    dash_end = min(current_length + dash_length, length)
-                    end_x = p1[0] + dash_end * dx
-                    end_y = p1[1] + dash_end * dy
-                    draw.line([(start_x, start_y), (end_x, end_y)], fill=color, width=width)
-                    current_length = dash_end
-                    segment_type = 3
-                elif segment_type == 3:  # Gap after dash
-                    current_length += gap_length
-                    segment_type = 0
-    
-    def draw_editing_points(self, draw, scaled_points, color_rgb, render_scale):
-        """Draw corner points for editing as rectangles."""
-        point_size = max(8, int(8 * render_scale))
-        point_color = (*color_rgb, 255)
-        outline_color = (255, 255, 255, 255)
-        
-        for point in scaled_points:
-            x, y = point
-            # Draw filled rectangle
-            half_size = point_size // 2
-            draw.rectangle([x - half_size, y - half_size,
-                           x + half_size, y + half_size],
-                          fill=point_color, outline=outline_color, width=2)
+        pts = np.asarray(points, dtype=np.float64)
+        delta = np.diff(pts, axis=0)
+        lengths = np.hypot(delta[:, 0], delta[:, 1])
+        
+        # Zero-length segments have no direction and draw nothing
+        keep = lengths > 0
+        origins, delta, lengths = pts[:-1][keep], delta[keep], lengths[keep]
+        units = delta / lengths[:, None]
+        
+        # Dashes for all segments at once: each segment gets ceil(length / period) dashes,
+        # starting every period along it and cut short at its end
+        period = dash_length + gap_length
+        counts = np.ceil(lengths / period).astype(np.intp)
+        segment = np.repeat(np.arange(len(lengths)), counts)
+        starts = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) * period
+        ends = np.minimum(starts + dash_length, lengths[segment])
+        
+        origins = origins[segment]
+        units = units[segment]
+        dashes = np.hstack((origins + starts[:, None] * units, origins + ends[:, None] * units))
+        for dash in dashes.tolist():
+            draw.line(dash, fill=color, width=width)
     
     def find_point_near(self, x, y, node, tolerance=15):
         """Find point index near a PDF coordinate."""
         render_scale = self.base_zoom * self.zoom_level
         tolerance_pdf = tolerance / render_scale if render_scale > 0 else tolerance
         
-        closest_index = None
-        closest_distance = float('inf')
+        if not len(node.points):
+            return None
         
-        for i, point in enumerate(node.points):
-            dist = math.sqrt((point[0] - x)**2 + (point[1] - y)**2)
-            if dist < closest_distance:
-                closest_distance = dist
-                closest_index = i
+        pts = np.frombuffer(node.points.coords).reshape(-1, 2)
+        offset = pts - (x, y)
+        distances_sq = (offset * offset).sum(axis=1)
+        closest_index = int(np.argmin(distances_sq))
         
-        if closest_index is not None and closest_distance <= tolerance_pdf:
+        if distances_sq[closest_index] <= tolerance_pdf * tolerance_pdf:
             return closest_index
         return None
     
@@ -1129,28 +1358,16 @@ class PDFViewer(tk.Canvas):
         if len(node.points) < 2:
             return None
         
-        closest_segment = None
-        closest_distance = float('inf')
-        insert_index = 0
+        dist_sq, closest_segment = self.nearest_segment(node, x, y, tolerance_pdf)
+        if dist_sq > tolerance_pdf * tolerance_pdf:
+            return None
         
-        for i in range(len(node.points) - 1):
-            p1 = node.points[i]
-            p2 = node.points[i + 1]
-            
-            # Calculate distance from point to line segment
-            dist = self.point_to_line_distance((x, y), p1, p2)
-            
-            if dist < closest_distance:
-                closest_distance = dist
-                closest_segment = i
-                # Determine which side of the segment the point is closer to
-                dist_to_p1 = math.sqrt((p1[0] - x)**2 + (p1[1] - y)**2)
-                dist_to_p2 = math.sqrt((p2[0] - x)**2 + (p2[1] - y)**2)
-                insert_index = i + 1 if dist_to_p2 < dist_to_p1 else i
-        
-        if closest_segment is not None and closest_distance <= tolerance_pdf:
-            return insert_index
-        return None
+        # Determine which side of the segment the point is closer to
+        p1 = node.points[closest_segment]
+        p2 = node.points[closest_segment + 1]
+        dist_to_p1 = (p1[0] - x) ** 2 + (p1[1] - y) ** 2
+        dist_to_p2 = (p2[0] - x) ** 2 + (p2[1] - y) ** 2
+        return closest_segment + 1 if dist_to_p2 < dist_to_p1 else closest_segment
     
     def show_point_context_menu(self, x, y, point_index):
         """Show context menu for a point in editing mode."""
@@ -1225,7 +1442,7 @@ class PDFViewer(tk.Canvas):
             constrained_y = ref_y
         
         self.add_point_preview_pos = (constrained_x, constrained_y)
-        self.quick_redraw()  # Update preview
+        self.draw_native_items()  # Update preview
     
     def confirm_add_point(self, pdf_x, pdf_y):
         """Confirm and add the point at the preview position."""
@@ -1311,7 +1528,7 @@ class PDFViewer(tk.Canvas):
             new_points.append((int(new_x), int(new_y)))
 
         # Replace points and redraw
-        node.points = new_points
+        node.points = PointList(new_points)
         # Keep selection and editing state consistent
         if node == self.selected_node:
             self.selected_node = node
@@ -1324,6 +1541,8 @@ class PDFViewer(tk.Canvas):
         """Go to a specific page."""
         if 0 <= page_number < self.total_pages:
             self.current_page = page_number
+            # Queued renders of pages no longer next to this one would delay it
+            self.cancel_prefetch(keep_near=page_number)
             # Reset pan when changing pages, but keep zoom level
             self.pan_x = 0
             self.pan_y = 0
@@ -1332,19 +1551,19 @@ class PDFViewer(tk.Canvas):
             self.pdf_page_height = 0
             if self.zoom_level == 1.0:
                 self.fit_to_window = True
-            self.render_page()
+            self.render_page(dirty=False)
             # Ensure focus for keyboard events
             self.focus_set()
     
     def handle_page_up(self, event=None):
         """Handle PageUp key press."""
-        if self.doc:
+        if self.pdf_path:
             self.prev_page()
         return "break"  # Prevent event propagation
     
     def handle_page_down(self, event=None):
         """Handle PageDown key press."""
-        if self.doc:
+        if self.pdf_path:
             self.next_page()
         return "break"  # Prevent event propagation
     
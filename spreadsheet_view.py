@@ -1,12 +1,266 @@
 """
 Spreadsheet view for displaying nodes and deviations.
 """
+import os
+import shutil
+import hashlib
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from models import Node, Deviation, HAZOPData
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+from tkinter import ttk, filedialog, messagebox, font as tkfont
+from models import Node, Deviation, HAZOPData, hex_to_rgb
+from functools import lru_cache
+from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor
+
+
+@lru_cache(maxsize=256)
+def light_shade(hex_color):
+    """Return a node color lightened for use as a background, as "RRGGBB"."""
+    return "".join(f"{min(255, c + 50):02x}" for c in hex_to_rgb(hex_color))
+
+
+@lru_cache(maxsize=256)
+def node_fill(hex_color):
+    """Return the Excel fill for a node color, shared by every row of that color."""
+    from openpyxl.styles import PatternFill
+    bg_color = light_shade(hex_color)
+    return PatternFill(start_color=bg_color, end_color=bg_color, fill_type="solid")
+
+
+@lru_cache(maxsize=None)
+def export_styles():
+    """Return the (border, spanning cell alignment, header font, header fill, header alignment) used in Excel exports."""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    thin = Side(style='thin')
+    return (Border(left=thin, right=thin, top=thin, bottom=thin),
+            Alignment(vertical="top", wrap_text=True),
+            Font(bold=True),
+            PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid"),
+            Alignment(horizontal="center", vertical="center"))
+
+
+@lru_cache(maxsize=None)
+def span_borders():
+    """Return the (first, middle, last) row borders that outline a cell spanning several export rows."""
+    from openpyxl.styles import Border, Side
+    thin = Side(style='thin')
+    return (Border(left=thin, right=thin, top=thin),
+            Border(left=thin, right=thin),
+            Border(left=thin, right=thin, bottom=thin))
+
+
+# Most list items a tree row shows; the rest are counted as "(+N more)"
+MAX_ROW_LINES = 3
+
+
+EXPORT_HEADERS = ["Node", "Page", "Deviation", "Causes", "Consequence", "Safeguards", "Recommendations", "Comments"]
+
+
+def column_widths(pages):
+    """Return the Excel column widths that fit the exported text, capped at 50, as a tuple."""
+    widths = [len(header) for header in EXPORT_HEADERS]
+    for page_num, page_nodes in pages:
+        widths[1] = max(widths[1], len(str(page_num + 1)))
+        for node in page_nodes:
+            widths[0] = max(widths[0], len(node.name or f"Node {page_num + 1}"))
+            for dev in node.deviations:
+                widths[2] = max(widths[2], len(dev.deviation))
+                widths[4] = max(widths[4], len(dev.consequence))
+                widths[7] = max(widths[7], len(dev.comments))
+                for col, texts in ((3, dev.causes), (5, dev.safeguards), (6, dev.recommendations)):
+                    if texts:
+                        widths[col] = max(widths[col], max(map(len, texts)))
+    return tuple(min(width + 2, 50) for width in widths)
+
+
+def export_rows(pages):
+    """Yield (node color, column values, position) for each row of the Excel export.
+    
+    A deviation takes one row per cause, safeguard or recommendation, with its
+    other columns filled on the first of them only. position is "first",
+    "middle" or "last" within such a group, or "single" for a one-row group.
+    """
+    for page_num, page_nodes in pages:
+        for node in page_nodes:
+            node_name = node.name or f"Node {page_num + 1}"
+            if not node.deviations:
+                yield node.color, (node_name, page_num + 1, None, None, None, None, None, None), "single"
+                continue
+            
+            for dev in node.deviations:
+                items = list(zip_longest(dev.causes, dev.safeguards, dev.recommendations)) or [(None, None, None)]
+                last = len(items) - 1
+                for i, (cause, safeguard, recommendation) in enumerate(items):
+                    if i == 0:
+                        yield node.color, (node_name, page_num + 1, dev.deviation, cause, dev.consequence,
+                                     safeguard, recommendation, dev.comments), "first" if last else "single"
+                    else:
+                        yield node.color, (None, None, None, cause, None, safeguard, recommendation, None), \
+                            "last" if i == last else "middle"
+
+
+# (content digest, path, (size, mtime)) of the last workbook written, so exporting an
+# unchanged analysis again copies that file instead of rebuilding it
+_last_export = None
+
+
+def file_stamp(path):
+    """Return (size, modification time) of a file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def write_workbook(filename, rows, widths):
+    """Write the HAZOP table to an Excel file.
+    
+    rows is a tuple of export_rows() output and widths the column_widths(), both
+    built on the main thread. Uses xlsxwriter when it is installed and openpyxl
+    otherwise. Touches no Tk widgets or model objects, so it can run off the main thread.
+    """
+    global _last_export
+    # A digest of everything the sheet shows, to tell whether the last export can be reused
+    digest = hashlib.blake2b(repr((rows, widths)).encode(), digest_size=16).digest()
+    reuse = None
+    if _last_export is not None and _last_export[0] == digest:
+        if file_stamp(_last_export[1]) == _last_export[2]:
+            reuse = _last_export[1]
+            if reuse == filename:
+                return  # Already written and untouched since
+    
+    try:
+        import xlsxwriter
+    except ImportError:  # xlsxwriter is optional; openpyxl is always installed
+        xlsxwriter = None
+    # The workbook goes to a temporary file that replaces the target only once it
+    # is complete, so a failed export never leaves a truncated file behind
+    tmp_path = filename + '.tmp'
+    try:
+        if reuse is not None:
+            shutil.copyfile(reuse, tmp_path)
+        elif xlsxwriter is not None:
+            write_workbook_xlsxwriter(tmp_path, rows, widths)
+        else:
+            write_workbook_openpyxl(tmp_path, rows, widths)
+        os.replace(tmp_path, filename)
+        _last_export = (digest, filename, file_stamp(filename))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_workbook_xlsxwriter(filename, rows, widths):
+    """Write the export with xlsxwriter, which keeps only the current row in memory."""
+    import xlsxwriter
+    
+    wb = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    ws = wb.add_worksheet("HAZOP Analysis")
+    
+    # Borders as format properties: all round, or outlining a cell spanning several rows
+    full, span_first, span_middle, span_last = (
+        (('border', 1),),
+        (('left', 1), ('right', 1), ('top', 1)),
+        (('left', 1), ('right', 1)),
+        (('left', 1), ('right', 1), ('bottom', 1)))
+    formats = {}
+    
+    def cell_format(fill=None, border=full, wrap=False):
+        # Each distinct combination becomes one format in the file
+        key = (fill, border, wrap)
+        fmt = formats.get(key)
+        if fmt is None:
+            properties = dict(border)
+            if fill is not None:
+                properties.update(bg_color="#" + fill, pattern=1)
+            if wrap:
+                properties.update(valign="top", text_wrap=True)
+            fmt = formats[key] = wb.add_format(properties)
+        return fmt
+    
+    header_format = wb.add_format({'bold': True, 'bg_color': '#CCCCCC', 'pattern': 1,
+                                   'align': 'center', 'valign': 'vcenter'})
+    ws.write_row(0, 0, EXPORT_HEADERS, header_format)
+    for col, width in enumerate(widths):
+        ws.set_column(col, col, width)
+    
+    borders = {"single": full, "first": span_first, "middle": span_middle, "last": span_last}
+    item_format = cell_format()
+    for row, (color, values, position) in enumerate(rows, 1):
+        # Node, page, deviation, consequence and comments span the deviation's rows
+        wrap = position == "first"
+        span = cell_format(None, borders[position], wrap)
+        cell_formats = (cell_format(light_shade(color), borders[position], wrap), span, span,
+                        item_format, span, item_format, item_format, span)
+        for col, (value, fmt) in enumerate(zip(values, cell_formats)):
+            ws.write(row, col, value, fmt)
+    
+    wb.close()
+
+
+def write_workbook_openpyxl(filename, rows, widths):
+    """Write the export with openpyxl in write-only mode."""
+    # openpyxl is slow to import, so load it only when exporting
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    
+    # Rows are streamed out as they are appended instead of kept as cell objects
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("HAZOP Analysis")
+    
+    thin_border, top_alignment, header_font, header_fill, header_alignment = export_styles()
+    
+    span_first, span_middle, span_last = span_borders()
+    
+    def make_cell(value=None, fill=None, alignment=None, border=thin_border):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.border = border
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
+    
+    # Headers
+    header_cells = []
+    for header in EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    
+    # Column widths have to be set before the first row is written
+    for col, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    
+    ws.append(header_cells)
+    
+    # Write data
+    borders = {"single": thin_border, "first": span_first, "middle": span_middle, "last": span_last}
+    for color, values, position in rows:
+        # Node, page, deviation, consequence and comments are outlined as one box rather than merged
+        border = borders[position]
+        alignment = top_alignment if position == "first" else None
+        node_name, page, deviation, cause, consequence, safeguard, recommendation, comments = values
+        ws.append([
+            make_cell(node_name, node_fill(color), alignment, border),
+            make_cell(page, alignment=alignment, border=border),
+            make_cell(deviation, alignment=alignment, border=border),
+            make_cell(cause),
+            make_cell(consequence, alignment=alignment, border=border),
+            make_cell(safeguard),
+            make_cell(recommendation),
+            make_cell(comments, alignment=alignment, border=border),
+        ])
+    
+    wb.save(filename)
+
+
+# Exports run one at a time, off the Tk main thread
+_export_executor = ThreadPoolExecutor(max_workers=1)
 
 
 class SpreadsheetView(tk.Toplevel):
@@ -21,9 +275,20 @@ class SpreadsheetView(tk.Toplevel):
         
         # Mapping from treeview item IDs to (node, deviation) tuples
         self.item_to_deviation = {}
+        # Mapping from node row item IDs to nodes
+        self.item_to_node = {}
+        # Mapping from id() of each shown deviation to its row item ID
+        self.deviation_items = {}
+        self._row_lines = None  # Text lines that fit in a tree row
+        # This window's own tree style, so resizing its rows restyles no other tree
+        self._tree_style = f"Sheet{id(self)}.Treeview"
+        self._export_future = None  # Workbook being written in the background
+        # Set when data changed while the window was minimized or withdrawn
+        self._dirty = False
         
         self.create_widgets()
         self.refresh_data()
+        self.bind("<Map>", self.on_map)
     
     def create_widgets(self):
         """Create the spreadsheet widgets."""
@@ -32,7 +297,11 @@ class SpreadsheetView(tk.Toplevel):
         toolbar.pack(fill=tk.X, padx=5, pady=5)
         
         ttk.Button(toolbar, text="Refresh", command=self.refresh_data).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Export to Excel", command=self.export_to_excel).pack(side=tk.LEFT, padx=2)
+        self.export_button = ttk.Button(toolbar, text="Export to Excel", command=self.export_to_excel)
+        self.export_button.pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Expand All", command=self.expand_all).pack(side=tk.LEFT, padx=2)
+        # Shown while an export is being written
+        self.export_progress = ttk.Progressbar(toolbar, mode="indeterminate", length=120)
         
         # Treeview with scrollbars
         frame = ttk.Frame(self)
@@ -40,7 +309,13 @@ class SpreadsheetView(tk.Toplevel):
         
         # Create treeview
         columns = ("Deviation", "Causes", "Consequence", "Safeguards", "Recommendations")
-        self.tree = ttk.Treeview(frame, columns=columns, show="tree headings", height=20)
+        self.tree = ttk.Treeview(frame, columns=columns, show="tree headings", height=20,
+                                 style=self._tree_style)
+        
+        # Configure tags
+        self.tree.tag_configure("node", background="#E0E0E0", font=("Arial", 10, "bold"))
+        self.tree.tag_configure("deviation", background="#FFFFFF")
+        self.set_row_lines(1)
         
         # Configure columns
         self.tree.heading("#0", text="Node")
@@ -57,6 +332,7 @@ class SpreadsheetView(tk.Toplevel):
         
         # Bind double-click event
         self.tree.bind("<Double-Button-1>", self.on_double_click)
+        self.tree.bind("<<TreeviewOpen>>", self.on_node_open)
         
         # Pack
         self.tree.grid(row=0, column=0, sticky=tk.NSEW)
@@ -66,11 +342,27 @@ class SpreadsheetView(tk.Toplevel):
         frame.grid_rowconfigure(0, weight=1)
         frame.grid_columnconfigure(0, weight=1)
     
+    def mark_dirty(self):
+        """Refresh now if the window is shown, otherwise once it is next mapped."""
+        if self.winfo_viewable():
+            self.refresh_data()
+        else:
+            self._dirty = True
+    
+    def on_map(self, event):
+        """Catch up on changes made while the window was hidden."""
+        # Child widgets share the toplevel's bindings, so ignore their Map events
+        if event.widget is self and self._dirty:
+            self.refresh_data()
+    
     def refresh_data(self):
         """Refresh the spreadsheet data."""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._dirty = False
+        # Clear existing items in one Tk call
+        self.tree.delete(*self.tree.get_children())
+        self.item_to_deviation.clear()
+        self.item_to_node.clear()
+        self.deviation_items.clear()
         
         # Check if we have data
         if not self.hazop_data or not self.hazop_data.nodes:
@@ -78,88 +370,110 @@ class SpreadsheetView(tk.Toplevel):
             self.tree.insert("", tk.END, text="No nodes found", values=("", "", "", "", ""))
             return
         
-        # Group nodes by page
-        nodes_by_page = {}
-        for node in self.hazop_data.nodes:
-            page = node.page_number
-            if page not in nodes_by_page:
-                nodes_by_page[page] = []
-            nodes_by_page[page].append(node)
-        
-        # Add nodes
-        for page_num in sorted(nodes_by_page.keys()):
-            page_nodes = nodes_by_page[page_num]
+        # Add nodes, grouped by page
+        max_lines = 1
+        for page_num, page_nodes in self.hazop_data.pages():
             for node in page_nodes:
+                for dev in node.deviations:
+                    max_lines = max(max_lines, self.deviation_lines(dev))
+                
                 # Create node item with background color
                 node_id = self.tree.insert("", tk.END, text=node.name or f"Node {page_num}",
                                           values=("", "", "", "", ""),
                                           tags=("node",))
                 
-                # Configure node row color
-                rgb = self.hex_to_rgb(node.color)
-                # Convert to a lighter shade for background
-                bg_color = f"#{min(255, rgb[0]+50):02x}{min(255, rgb[1]+50):02x}{min(255, rgb[2]+50):02x}"
-                text_color = "#000000" if sum(rgb) > 384 else "#FFFFFF"
-                
                 self.tree.set(node_id, "Deviation", f"Page {page_num + 1}")
-                
-                # Add deviations
-                if node.deviations:
-                    for dev in node.deviations:
-                        # Calculate max rows needed for this deviation
-                        max_items = max(
-                            len(dev.causes) if dev.causes else 0,
-                            len(dev.safeguards) if dev.safeguards else 0,
-                            len(dev.recommendations) if dev.recommendations else 0,
-                            1  # At least one row for deviation and consequence
-                        )
-                        
-                        # Create rows for this deviation
-                        # Show deviation and consequence on all rows for clarity
-                        for i in range(max_items):
-                            # Deviation name (show on all rows)
-                            deviation_text = dev.deviation if i == 0 else "↳"  # Continuation marker
-                            
-                            # Causes (one per row)
-                            cause_text = dev.causes[i] if dev.causes and i < len(dev.causes) else ""
-                            
-                            # Consequence (show on all rows)
-                            consequence_text = dev.consequence if i == 0 else "↳"
-                            
-                            # Safeguards (one per row)
-                            safeguard_text = dev.safeguards[i] if dev.safeguards and i < len(dev.safeguards) else ""
-                            
-                            # Recommendations (one per row)
-                            recommendation_text = dev.recommendations[i] if dev.recommendations and i < len(dev.recommendations) else ""
-                            
-                            dev_item_id = self.tree.insert(node_id, tk.END,
-                                            text="",
-                                            values=(
-                                                deviation_text,
-                                                cause_text,
-                                                consequence_text,
-                                                safeguard_text,
-                                                recommendation_text
-                                            ),
-                                            tags=("deviation",))
-                            
-                            # Store mapping: store for all rows of this deviation
-                            # This allows double-clicking on any row to edit the deviation
-                            self.item_to_deviation[dev_item_id] = (node, dev)
-                else:
-                    # Insert empty deviation row
-                    self.tree.insert(node_id, tk.END,
-                                    text="",
-                                    values=("", "", "", "", ""),
-                                    tags=("deviation",))
+                # Deviation rows are only inserted once the node is expanded
+                self.item_to_node[node_id] = node
+                self.tree.insert(node_id, tk.END, text="", tags=("placeholder",))
         
-        # Configure tags
-        self.tree.tag_configure("node", background="#E0E0E0", font=("Arial", 10, "bold"))
-        self.tree.tag_configure("deviation", background="#FFFFFF")
+        # Rows are all one height, so make them tall enough for the longest list shown
+        self.set_row_lines(max_lines)
+    
+    def set_row_lines(self, lines):
+        """Size this window's tree rows to show the given number of text lines."""
+        if lines == self._row_lines:
+            return  # Restyling makes the tree lay itself out again
+        self._row_lines = lines
+        line_height = tkfont.nametofont("TkDefaultFont").metrics("linespace")
+        ttk.Style().configure(self._tree_style, rowheight=max(30, lines * line_height + 8))
+    
+    def on_node_open(self, event):
+        """Insert a node's deviation rows the first time it is expanded."""
+        self.ensure_populated(self.tree.focus())
+    
+    def ensure_populated(self, node_id):
+        """Replace a node row's placeholder child with its deviation rows."""
+        node = self.item_to_node.get(node_id)
+        children = self.tree.get_children(node_id)
+        if node is None or not children or "placeholder" not in self.tree.item(children[0], "tags"):
+            return
+        self.tree.delete(children[0])
+        self.populate_node(node_id, node)
+    
+    def expand_all(self):
+        """Expand every node row, inserting all rows before any is opened."""
+        node_ids = self.tree.get_children()
+        for node_id in node_ids:
+            self.ensure_populated(node_id)
+        # Setting open does not fire <<TreeviewOpen>>, and the tree lays out once when idle
+        for node_id in node_ids:
+            self.tree.item(node_id, open=True)
+    
+    def populate_node(self, node_id, node):
+        """Insert the deviation rows of a node under its row."""
+        # Add deviations
+        if node.deviations:
+            for dev in node.deviations:
+                self.insert_deviation_row(node_id, node, dev)
+        else:
+            # Insert empty deviation row
+            self.tree.insert(node_id, tk.END,
+                            text="",
+                            values=("", "", "", "", ""),
+                            tags=("deviation",))
+    
+    def deviation_lines(self, dev):
+        """Return how many text lines a deviation's row shows."""
+        return min(MAX_ROW_LINES, max(len(dev.causes), len(dev.safeguards), len(dev.recommendations)))
+    
+    def list_cell(self, items):
+        """Return a list column's text, one item per line, counting the items past MAX_ROW_LINES."""
+        text = "\n".join(items[:MAX_ROW_LINES])
+        if len(items) > MAX_ROW_LINES:
+            text += f" (+{len(items) - MAX_ROW_LINES} more)"
+        return text
+    
+    def deviation_values(self, dev):
+        """Return the column values of a deviation's row."""
+        return (dev.deviation,
+                self.list_cell(dev.causes),
+                dev.consequence,
+                self.list_cell(dev.safeguards),
+                self.list_cell(dev.recommendations))
+    
+    def insert_deviation_row(self, node_id, node, dev):
+        """Insert the row of one deviation under its node's row."""
+        dev_item_id = self.tree.insert(node_id, tk.END,
+                        text="",
+                        values=self.deviation_values(dev),
+                        tags=("deviation",))
         
-        # Set row height to accommodate content
-        style = ttk.Style()
-        style.configure("Treeview", rowheight=30)  # Increased row height for better visibility
+        # Store mapping: allows double-clicking the row to edit the deviation
+        self.item_to_deviation[dev_item_id] = (node, dev)
+        self.deviation_items[id(dev)] = dev_item_id
+    
+    def refresh_deviation(self, node, dev):
+        """Update the row of one edited deviation in place."""
+        item = self.deviation_items.get(id(dev))
+        # The id may have been reused by a new deviation since an old one was removed,
+        # so check the row still shows this one
+        if item is None or self.item_to_deviation.get(item, (None, None))[1] is not dev:
+            return  # Its node was never expanded, so it is built fresh when it is
+        self.tree.item(item, values=self.deviation_values(dev))
+        lines = self.deviation_lines(dev)
+        if lines > self._row_lines:
+            self.set_row_lines(lines)
     
     def on_double_click(self, event):
         """Handle double-click on a treeview item."""
@@ -174,8 +488,10 @@ class SpreadsheetView(tk.Toplevel):
             from deviation_editor import DeviationEditor
             
             def on_save(dev):
-                # The deviation object is updated in place, just refresh the view
-                self.refresh_data()
+                if editor.result != "changed":
+                    return
+                # The deviation object is updated in place, so only its rows need redoing
+                self.refresh_deviation(node, deviation)
                 # Notify parent app to update PDF viewer if needed
                 if self.parent_app and hasattr(self.parent_app, 'pdf_viewer'):
                     self.parent_app.pdf_viewer.render_page()
@@ -183,160 +499,57 @@ class SpreadsheetView(tk.Toplevel):
             editor = DeviationEditor(self, deviation, on_save_callback=on_save)
             self.wait_window(editor)
     
-    def hex_to_rgb(self, hex_color):
-        """Convert hex color to RGB tuple."""
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    
-    def export_to_excel(self):
-        """Export data to Excel file."""
+    def export_to_excel(self, close_when_done=False):
+        """Export data to Excel file, writing it on a background thread.
+        
+        With close_when_done, the window closes once the export has finished or been cancelled.
+        """
+        if self._export_future is not None and not self._export_future.done():
+            return  # One export at a time
+        if not self.hazop_data or not self.hazop_data.nodes:
+            messagebox.showwarning("Warning", "No data to export.")
+            if close_when_done:
+                self.destroy()
+            return
+        
         filename = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
             filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")]
         )
         
         if not filename:
+            if close_when_done:
+                self.destroy()
             return
         
+        # Lay the sheet out here, so edits made while it is written do not reach the worker
+        pages = self.hazop_data.pages()
+        rows = tuple(export_rows(pages))
+        widths = column_widths(pages)
+        self.export_button.config(state="disabled")
+        self.export_progress.pack(side=tk.LEFT, padx=2)
+        self.export_progress.start()
+        self._export_future = _export_executor.submit(write_workbook, filename, rows, widths)
+        # Polled from the main window, so the export is still reported if this one is closed first
+        self.parent_app.after(100, self._poll_export, filename, close_when_done)
+    
+    def _poll_export(self, filename, close_when_done):
+        """Report a finished background export."""
+        if not self._export_future.done():
+            self.parent_app.after(100, self._poll_export, filename, close_when_done)
+            return
+        
+        window_open = self.winfo_exists()
+        if window_open:
+            self.export_progress.stop()
+            self.export_progress.pack_forget()
+            self.export_button.config(state="normal")
+        parent = self if window_open else self.parent_app
         try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "HAZOP Analysis"
-            
-            # Headers
-            headers = ["Node", "Page", "Deviation", "Causes", "Consequence", "Safeguards", "Recommendations", "Comments"]
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Border style
-            thin_border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            
-            row = 2
-            
-            # Group nodes by page
-            nodes_by_page = {}
-            for node in self.hazop_data.nodes:
-                page = node.page_number
-                if page not in nodes_by_page:
-                    nodes_by_page[page] = []
-                nodes_by_page[page].append(node)
-            
-            # Write data
-            for page_num in sorted(nodes_by_page.keys()):
-                page_nodes = nodes_by_page[page_num]
-                for node in page_nodes:
-                    node_name = node.name or f"Node {page_num + 1}"
-                    
-                    if node.deviations:
-                        for dev in node.deviations:
-                            # Calculate max rows needed for this deviation
-                            max_items = max(
-                                len(dev.causes),
-                                len(dev.safeguards),
-                                len(dev.recommendations),
-                                1
-                            )
-                            
-                            for i in range(max_items):
-                                # Node (span across rows)
-                                if i == 0:
-                                    ws.cell(row=row, column=1, value=node_name)
-                                    if max_items > 1:
-                                        ws.merge_cells(f'A{row}:A{row + max_items - 1}')
-                                        ws.cell(row=row, column=1).alignment = Alignment(vertical="top", wrap_text=True)
-                                
-                                # Page (span across rows)
-                                if i == 0:
-                                    ws.cell(row=row, column=2, value=page_num + 1)
-                                    if max_items > 1:
-                                        ws.merge_cells(f'B{row}:B{row + max_items - 1}')
-                                        ws.cell(row=row, column=2).alignment = Alignment(vertical="top", wrap_text=True)
-                                
-                                # Deviation (span across rows)
-                                if i == 0:
-                                    ws.cell(row=row, column=3, value=dev.deviation)
-                                    if max_items > 1:
-                                        ws.merge_cells(f'C{row}:C{row + max_items - 1}')
-                                        ws.cell(row=row, column=3).alignment = Alignment(vertical="top", wrap_text=True)
-                                
-                                # Causes
-                                if i < len(dev.causes):
-                                    ws.cell(row=row, column=4, value=dev.causes[i])
-                                
-                                # Consequence (span across rows)
-                                if i == 0:
-                                    ws.cell(row=row, column=5, value=dev.consequence)
-                                    if max_items > 1:
-                                        ws.merge_cells(f'E{row}:E{row + max_items - 1}')
-                                        ws.cell(row=row, column=5).alignment = Alignment(vertical="top", wrap_text=True)
-                                
-                                # Safeguards
-                                if i < len(dev.safeguards):
-                                    ws.cell(row=row, column=6, value=dev.safeguards[i])
-                                
-                                # Recommendations
-                                if i < len(dev.recommendations):
-                                    ws.cell(row=row, column=7, value=dev.recommendations[i])
-                                
-                                # Comments
-                                if i == 0:
-                                    ws.cell(row=row, column=8, value=dev.comments)
-                                    if max_items > 1:
-                                        ws.merge_cells(f'H{row}:H{row + max_items - 1}')
-                                        ws.cell(row=row, column=8).alignment = Alignment(vertical="top", wrap_text=True)
-                                
-                                # Apply borders
-                                for col in range(1, 9):
-                                    ws.cell(row=row, column=col).border = thin_border
-                                
-                                # Apply node background color to first column (merged cell)
-                                if i == 0:
-                                    rgb = self.hex_to_rgb(node.color)
-                                    bg_color = f"{min(255, rgb[0]+50):02x}{min(255, rgb[1]+50):02x}{min(255, rgb[2]+50):02x}"
-                                    fill = PatternFill(start_color=bg_color, end_color=bg_color, fill_type="solid")
-                                    # Apply fill to the merged cell range
-                                    if max_items > 1:
-                                        for r in range(row, row + max_items):
-                                            ws.cell(row=r, column=1).fill = fill
-                                    else:
-                                        ws.cell(row=row, column=1).fill = fill
-                                
-                                row += 1
-                    else:
-                        # Node with no deviations
-                        ws.cell(row=row, column=1, value=node_name)
-                        ws.cell(row=row, column=2, value=page_num + 1)
-                        for col in range(1, 9):
-                            ws.cell(row=row, column=col).border = thin_border
-                        rgb = self.hex_to_rgb(node.color)
-                        bg_color = f"{min(255, rgb[0]+50):02x}{min(255, rgb[1]+50):02x}{min(255, rgb[2]+50):02x}"
-                        fill = PatternFill(start_color=bg_color, end_color=bg_color, fill_type="solid")
-                        ws.cell(row=row, column=1).fill = fill
-                        row += 1
-            
-            # Auto-adjust column widths
-            for col in range(1, 9):
-                max_length = 0
-                column = get_column_letter(col)
-                for cell in ws[column]:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column].width = adjusted_width
-            
-            wb.save(filename)
-            messagebox.showinfo("Success", f"Data exported to {filename}")
+            self._export_future.result()
+            messagebox.showinfo("Success", f"Data exported to {filename}", parent=parent)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to export: {str(e)}")
+            messagebox.showerror("Error", f"Failed to export: {str(e)}", parent=parent)
+        if close_when_done and window_open:
+            self.destroy()
 